@@ -0,0 +1,173 @@
+import asyncio
+import os
+import urllib.parse
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import yarl
+
+from codec import get_codec
+from rateLimiter import RateLimiter, RateLimitError
+from requestSigner import RequestSigner
+
+
+class AsyncFtxClient:
+    """
+    asyncio mirror of FtxClient, one pooled aiohttp session for every call
+    so hundreds of requests can be in flight on a single event loop.
+    Methods return the exchange result and raise on failure.
+
+        async with AsyncFtxClient() as ftx:
+            await asyncio.gather(*(ftx.place_order('XTZ-PERP', 'buy', 1, price=p) for p in prices))
+    """
+    _ENDPOINT = 'https://ftx.com/api/'
+    _PATH_PREFIX = urllib.parse.urlsplit(_ENDPOINT).path
+
+    def __init__(self, subaccount_name=None, rate_limits=None, connection_limit: int = 100, codec=None) -> None:
+        self._api_key = os.getenv('')
+        self._api_secret = os.getenv('')
+        self._subaccount_name = subaccount_name or ""
+        self._signer = None
+        self._limiter = RateLimiter(rate_limits)
+        self.codec = get_codec(codec)
+        self._connection_limit = connection_limit
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'AsyncFtxClient':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._connection_limit))
+        return self._session
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return await self._request('GET', path, params=params)
+
+    async def _post(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return await self._request('POST', path, json_body=params)
+
+    async def _delete(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return await self._request('DELETE', path, json_body=params)
+
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                       json_body: Optional[Dict[str, Any]] = None) -> Any:
+        # Same query encoding requests uses: None params dropped
+        query = urllib.parse.urlencode(
+            {k: v for k, v in (params or {}).items() if v is not None}, doseq=True)
+        path_query = path + (f'?{query}' if query else '')
+        path_url = self._PATH_PREFIX + path_query
+        body = self.codec.dumps(json_body) if json_body is not None else None
+        headers = {'Content-Type': 'application/json'} if body else {}
+        if self._signer is None:
+            self._signer = RequestSigner(
+                self._api_key, self._api_secret, self._subaccount_name)
+
+        # Sent as encoded, so yarl does not requote BTC%2FUSD into BTC/USD after signing
+        url = yarl.URL(self._ENDPOINT + path_query, encoded=True)
+        endpoint_class = self._limiter.endpoint_class(method, path)
+        session = self._get_session()
+        for attempt in range(self._limiter.max_retries + 1):
+            await self._limiter.acquire_async(endpoint_class)
+            signed = {**headers, **self._signer.headers(method, path_url, body)}
+            async with session.request(method, url, data=body, headers=signed) as response:
+                if response.status == 429:
+                    await self._limiter.backoff_async(endpoint_class, attempt,
+                                                      response.headers.get('Retry-After'))
+                    continue
+                return await self._process_response(response)
+        raise RateLimitError(
+            f'{method} {path} still rate limited after {self._limiter.max_retries} retries')
+
+    async def _process_response(self, response: aiohttp.ClientResponse) -> Any:
+        try:
+            data = self.codec.loads(await response.read())
+        except ValueError:
+            response.raise_for_status()
+            raise
+        else:
+            if not data['success']:
+                raise Exception(data['error'])
+            return data['result']
+
+    ############################
+    # -CANCEL ORDERS
+    ############################
+
+    async def cancel_orders(self, market_name: str = None, conditional_orders: bool = False,
+                            limit_orders: bool = False, cancel_id: str = None, conditional_id: str = None) -> dict:
+        params = {'market': market_name,
+                  'conditionalOrdersOnly': conditional_orders,
+                  'limitOrdersOnly': limit_orders, }
+        if conditional_id:
+            return await self._delete(f'conditional_orders/{conditional_id}', params)
+        if cancel_id is not None:
+            return await self._delete(f'orders/{cancel_id}', params)
+        return await self._delete('orders', params)
+
+    ############################
+    # -GET OPEN ORDER
+    ############################
+
+    async def get_open_orders(self, market: str = None) -> List[dict]:
+        """Limit and conditional orders, both fetched concurrently"""
+        open, conditional = await asyncio.gather(self._get('orders', {'market': market}),
+                                                 self.get_open_conditional_orders(market))
+        return open + conditional
+
+    async def get_open_conditional_orders(self, market: str = None) -> List[dict]:
+        return await self._get('conditional_orders', {'market': market})
+
+    ############################
+    # -GET POSITION
+    ############################
+
+    async def get_positions(self, show_avg_price: bool = False) -> List[dict]:
+        return await self._get('positions', {'showAvgPrice': show_avg_price})
+
+    ############################
+    # -PLACE ORDER
+    ############################
+
+    async def place_order(self, market: str, side: str, size: float, type: str = 'limit',
+                          price: float = None, clientId: str = None, reduce_only: bool = False, ioc: bool = False, post_only: bool = False) -> dict:
+        return await self._post('orders', {'market': market,
+                                           'side': side,
+                                           'price': price,
+                                           'size': size,
+                                           'type': type,
+                                           'reduceOnly': reduce_only,
+                                           'ioc': ioc,
+                                           'postOnly': post_only,
+                                           'clientId': clientId,
+                                           })
+
+    ############################
+    # -PLACE CONDITIONAL ORDER
+    ############################
+
+    async def place_conditional_order(
+            self, market: str, side: str, size: float, type: str,
+            triggerPrice: float = None, clientId: str = None, limit_price: float = None, reduce_only: bool = True, cancel: bool = True,
+            trail_value: float = None) -> dict:
+        assert type in ('stop', 'takeProfit', 'trailingStop')
+        assert type in ('trailingStop',) or triggerPrice is not None, \
+            'Need trigger prices for stop losses and take profits'
+        assert type not in ('trailingStop',) or (triggerPrice is None and trail_value is not None), \
+            'Trailing stops need a trail value and cannot take a trigger price'
+
+        return await self._post('conditional_orders',
+                                {'market': market, 'side': side, 'triggerPrice': triggerPrice,
+                                 'size': size, 'reduceOnly': reduce_only, 'type': type,
+                                 'cancelLimitOnTrigger': cancel, 'orderPrice': limit_price, 'clientId': clientId,
+                                 **({'trailValue': trail_value} if trail_value is not None else {})})
@@ -0,0 +1,52 @@
+"""
+Per-order overhead of the signing path, before and after single-prepare signing
+    python benchmarks/bench_signing.py
+"""
+import hmac
+import os
+import sys
+import time
+import timeit
+
+from requests import Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ftxBulkOrder import FtxClient  # noqa: E402
+
+ORDER = {'market': 'XTZ-PERP', 'side': 'buy', 'price': 1.2345, 'size': 10.0, 'type': 'limit',
+         'reduceOnly': False, 'ioc': False, 'postOnly': False, 'clientId': None}
+
+
+def legacy_sign_and_prepare(ftx):
+    # Baseline path: prepare to sign, re-key HMAC, prepare again to send
+    request = Request('POST', ftx._ENDPOINT + 'orders', json=ORDER)
+    ts = int(time.time() * 1000)
+    prepared = request.prepare()
+    payload = f'{ts}{prepared.method}{prepared.path_url}'.encode()
+    if prepared.body:
+        payload += prepared.body
+    signature = hmac.new(ftx._api_secret.encode(),
+                         payload, 'sha256').hexdigest()
+    request.headers['FTX-KEY'] = ftx._api_key
+    request.headers['FTX-SIGN'] = signature
+    request.headers['FTX-TS'] = str(ts)
+    return request.prepare()
+
+
+def single_sign_and_prepare(ftx):
+    prepared = Request('POST', ftx._ENDPOINT + 'orders', json=ORDER).prepare()
+    ftx._sign_request(prepared)
+    return prepared
+
+
+def main(number=20000):
+    ftx = FtxClient()
+    ftx._api_key = 'benchmark-key'
+    ftx._api_secret = 'benchmark-secret'
+    for name, fn in (('legacy', legacy_sign_and_prepare), ('single-prepare', single_sign_and_prepare)):
+        best = min(timeit.repeat(lambda: fn(ftx), number=number, repeat=5))
+        print(f'{name:>15}: {best / number * 1e6:8.2f} us/order')
+
+
+if __name__ == '__main__':
+    main()
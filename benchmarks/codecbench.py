@@ -0,0 +1,57 @@
+"""
+Codec comparison on the markets, orders and positions payloads
+    python benchmarks/run.py --module codecbench
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import codec  # noqa: E402
+from payloads import encode, load_payload  # noqa: E402
+
+
+class _CodecBench:
+    name = None
+
+    def setup(self):
+        self.codec = codec.get_codec(self.name)
+        self.markets = encode(load_payload('markets'))
+        self.orders = encode(load_payload('orders'))
+        self.positions = encode(load_payload('positions'))
+        self.order_body = load_payload('orders')[0]
+
+    def time_decode_markets(self):
+        self.codec.loads(self.markets)
+
+    def time_decode_orders(self):
+        self.codec.loads(self.orders)
+
+    def time_decode_positions(self):
+        self.codec.loads(self.positions)
+
+    def time_encode_order(self):
+        self.codec.dumps(self.order_body)
+
+
+class Json(_CodecBench):
+    name = 'json'
+
+
+if 'orjson' in codec.CODECS:
+
+    class Orjson(_CodecBench):
+        name = 'orjson'
+
+if 'msgspec' in codec.CODECS:
+
+    class Msgspec(_CodecBench):
+        name = 'msgspec'
+
+    class MsgspecTyped(_CodecBench):
+        name = 'msgspec'
+
+        def time_decode_orders(self):
+            codec.decode_typed(self.orders, 'orders')
+
+        def time_decode_positions(self):
+            codec.decode_typed(self.positions, 'positions')
@@ -0,0 +1,23 @@
+"""
+Cold start benchmarks, each run is a fresh interpreter. Run with
+    python benchmarks/run.py --module coldstart
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def _python(*args):
+    subprocess.run([sys.executable, *args], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class ColdStart:
+
+    def time_import_bulk_command(self):
+        _python('-c', 'import bulkCommand')
+
+    def time_one_shot_help(self):
+        _python('bulkCommand.py', '-c', 'help')
@@ -0,0 +1,147 @@
+"""
+Benchmarks for the client hot paths, asv style: each class gets setup() then
+every time_* method is timed by benchmarks/run.py
+"""
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+from requests import Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import bulkCommand  # noqa: E402
+from bulkSubmit import BulkSubmitter  # noqa: E402
+import colorprint  # noqa: E402
+from colorprint import ColorPrint  # noqa: E402
+from consoleRenderer import ConsoleRenderer  # noqa: E402
+from commandParser import parse  # noqa: E402
+from ftxBulkOrder import FtxClient  # noqa: E402
+from ladder import build_ladder  # noqa: E402
+from marketData import L2Book  # noqa: E402
+from payloads import load_payload, order_row, response  # noqa: E402
+
+
+class _OfflineClient:
+    """Accepts every order call without touching the network"""
+    market = 'XTZ-PERP'
+    fatFinger = 1000
+
+    def place_order_cleanup(self, side, size, price=None):
+        pass
+
+    def place_conditional_order_cleanup(self, kind, size, trigger, side=None, limit_price=None):
+        pass
+
+
+class ProcessCommand:
+
+    def setup(self):
+        bulkCommand.cp = ColorPrint()
+        bulkCommand.bulk = BulkSubmitter()
+        self.ftx = _OfflineClient()
+        self.batch = '; '.join(['buy 1 @1.2345', 'sell 1 @1.3', 'stop 1 @1.1',
+                                'tp 1 @1.5 sell @1.49'] * 25)
+        self.sink = io.StringIO()
+
+    def time_single_order(self):
+        with redirect_stdout(self.sink):
+            bulkCommand.process_command(self.ftx, 'buy 1 @1.2345')
+
+    def time_batch_100(self):
+        with redirect_stdout(self.sink):
+            bulkCommand.process_command(self.ftx, self.batch)
+
+
+class CommandParser:
+
+    def setup(self):
+        self.split = 'split sell 0.1 into 10 from 11288 to 11355 geometric pyramid'
+
+    def time_parse_split_uncached(self):
+        parse.__wrapped__(self.split)
+
+    def time_parse_split_cached(self):
+        parse(self.split)
+
+
+class Ladder:
+
+    def time_ladder_50(self):
+        build_ladder(1.0, 2.0, 50, 10.0, price_increment=0.0001, size_increment=0.1)
+
+    def time_ladder_1000(self):
+        build_ladder(1.0, 2.0, 1000, 1000.0, price_increment=0.0001, size_increment=0.1)
+
+    def time_geometric_pyramid_1000(self):
+        build_ladder(1.0, 2.0, 1000, 1000.0, 'geometric', 'pyramid', 0.0001, 0.1)
+
+
+class SignRequest:
+
+    def setup(self):
+        self.ftx = FtxClient()
+        self.ftx._api_key = 'benchmark-key'
+        self.ftx._api_secret = 'benchmark-secret'
+        self.prepared = Request('POST', self.ftx._ENDPOINT + 'orders', json=order_row(0)).prepare()
+
+    def time_sign_order(self):
+        self.ftx._sign_request(self.prepared)
+
+
+class ProcessResponse:
+
+    def setup(self):
+        self.ftx = FtxClient()
+        self.markets = response(load_payload('markets'))
+        self.orders = response(load_payload('orders'))
+
+    def time_markets_1000(self):
+        self.ftx._process_response(self.markets)
+
+    def time_orders_500(self):
+        self.ftx._process_response(self.orders)
+
+
+class ColorPrintOutput:
+
+    def setup(self):
+        self.cp = ColorPrint()
+        self.sink = io.StringIO()
+        self.line = 'LIMIT order-market: XTZ-PERP,size: 10.0,price: 1.2345,side: buy'
+
+    def time_green(self):
+        with redirect_stdout(self.sink):
+            self.cp.green(self.line)
+
+
+class ColorPrintQueued:
+    """Same line as ColorPrintOutput, queued to the console renderer instead"""
+
+    def setup(self):
+        self.renderer = ConsoleRenderer(stream=io.StringIO())
+        self.cp = ColorPrint()
+        self.line = 'LIMIT order-market: XTZ-PERP,size: 10.0,price: 1.2345,side: buy'
+
+    def time_green(self):
+        colorprint.install(self.renderer)
+        try:
+            self.cp.green(self.line)
+        finally:
+            colorprint.install(None)
+
+
+class OrderbookUpdate:
+
+    def setup(self):
+        self.book = L2Book('XTZ-PERP')
+        self.book.apply({'bids': [[round(2.0 - i * 0.001, 3), 10.0] for i in range(200)],
+                         'asks': [[round(2.001 + i * 0.001, 3), 10.0] for i in range(200)]})
+        self.update = {'bids': [[1.999, 7.0]], 'asks': [[2.002, 3.0]], 'checksum': 0}
+        self.price = parse('buy 1 @bid-0.2%').price
+
+    def time_apply_update_with_checksum(self):
+        self.book.apply(self.update)
+
+    def time_resolve_relative_price(self):
+        self.price.resolve(self.book)
@@ -0,0 +1,61 @@
+"""
+Response payloads for the benchmarks. A recorded exchange reply saved as
+benchmarks/payloads/<name>.json (the full {"success", "result"} body) is used
+when present, otherwise a synthetic payload of the same shape is built.
+"""
+import json
+import os
+
+from requests import Response
+
+RECORDED = os.path.join(os.path.dirname(__file__), 'payloads')
+
+
+def market_row(i):
+    return {'name': f'COIN{i}-PERP', 'type': 'future', 'underlying': f'COIN{i}', 'enabled': True,
+            'ask': 1.2346 + i, 'bid': 1.2345 + i, 'last': 1.2345 + i, 'price': 1.2345 + i,
+            'priceIncrement': 0.0001, 'sizeIncrement': 1.0, 'minProvideSize': 1.0,
+            'change1h': 0.0012, 'change24h': -0.0345, 'volumeUsd24h': 123456789.0,
+            'postOnly': False, 'restricted': False, 'highLeverageFeeExempt': False}
+
+
+def order_row(i):
+    return {'id': 1000000 + i, 'clientId': None, 'market': 'XTZ-PERP', 'type': 'limit', 'side': 'buy',
+            'price': 1.2345 + i * 0.0001, 'size': 10.0, 'status': 'open', 'filledSize': 0.0,
+            'remainingSize': 10.0, 'reduceOnly': False, 'liquidation': False, 'avgFillPrice': None,
+            'postOnly': False, 'ioc': False, 'createdAt': '2021-05-01T12:00:00.000000+00:00'}
+
+
+def position_row(i):
+    return {'future': f'COIN{i}-PERP', 'size': 10.0 + i, 'side': 'buy', 'netSize': 10.0 + i,
+            'longOrderSize': 0.0, 'shortOrderSize': 5.0, 'cost': 12.345 * (i + 1), 'entryPrice': 1.2345,
+            'unrealizedPnl': 0.0, 'realizedPnl': -1.5, 'initialMarginRequirement': 0.1,
+            'maintenanceMarginRequirement': 0.03, 'openSize': 15.0 + i, 'collateralUsed': 1.2345,
+            'estimatedLiquidationPrice': 0.5432, 'recentAverageOpenPrice': 1.2345,
+            'recentPnl': -0.12, 'recentBreakEvenPrice': 1.2399}
+
+
+_SYNTHETIC = {'markets': (market_row, 1000),
+              'orders': (order_row, 500),
+              'positions': (position_row, 200)}
+
+
+def load_payload(name):
+    """The result rows of a recorded reply, or a synthetic one"""
+    recorded = os.path.join(RECORDED, f'{name}.json')
+    if os.path.exists(recorded):
+        with open(recorded) as f:
+            return json.load(f)['result']
+    row, count = _SYNTHETIC[name]
+    return [row(i) for i in range(count)]
+
+
+def encode(payload) -> bytes:
+    return json.dumps({'success': True, 'result': payload}).encode()
+
+
+def response(payload) -> Response:
+    reply = Response()
+    reply.status_code = 200
+    reply._content = encode(payload)
+    return reply
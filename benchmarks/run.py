@@ -0,0 +1,79 @@
+"""
+Runs the hot path benchmarks and tracks them against a saved baseline
+
+    python benchmarks/run.py --save baseline.json
+    python benchmarks/run.py --compare baseline.json
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def discover(module):
+    for name, cls in inspect.getmembers(module, inspect.isclass):
+        if cls.__module__ != module.__name__ or name.startswith('_'):
+            continue
+        for method in sorted(m for m in dir(cls) if m.startswith('time_')):
+            yield f'{name}.{method}', cls, method
+
+
+def run(benchmarks, repeat=5, pattern=None):
+    results = {}
+    for name, cls, method in benchmarks:
+        if pattern and pattern not in name:
+            continue
+        instance = cls()
+        if hasattr(instance, 'setup'):
+            instance.setup()
+        fn = getattr(instance, method)
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        results[name] = min(timer.repeat(repeat=repeat, number=number)) / number
+    return results
+
+
+def _fmt(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6), ('ns', 1e9)):
+        if seconds * scale >= 1:
+            return f'{seconds * scale:8.2f} {unit}'
+    return f'{seconds * 1e9:8.2f} ns'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Client hot path benchmarks')
+    parser.add_argument('--save', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown ratio reported as a regression')
+    parser.add_argument('-k', dest='pattern', help='only run benchmarks containing this')
+    parser.add_argument('--module', default='hotpaths', help='benchmark module to run')
+    args = parser.parse_args(argv)
+
+    module = __import__(args.module)
+    results = run(discover(module), pattern=args.pattern)
+    baseline = json.load(open(args.compare)) if args.compare else {}
+
+    regressions = []
+    for name, seconds in results.items():
+        line = f'{name:<40}{_fmt(seconds)}'
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f'   x{ratio:.2f} vs baseline'
+            if ratio > args.threshold:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
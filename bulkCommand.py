@@ -1,19 +1,23 @@
-from requests import Request, Session, Response
 import time
-import collections
-import datetime
-import json
+_STARTED = time.perf_counter()
 import logging
-import hmac
-import hashlib
-import os
-import urllib
-import numpy as np
+import argparse
+import sys
 from ftxBulkOrder import FtxClient
+from bulkSubmit import BulkSubmitter
+from clientPool import ClientPool
+from ladder import build_ladder
+from ladderDiff import diff_ladder, remaining
+from historyStore import ColumnStore, HistoryDownloader, KINDS
+from commandParser import (parse, parse_input, ParseError, ORDER_SIDES, OrderCommand, ConditionalCommand,
+                           ShowOrdersCommand, CancelCommand, InstrumentCommand, StatsCommand, PoolCommand,
+                           FatFingerCommand, PositionCommand, SplitCommand, BracketCommand, InflightCommand,
+                           BasketCommand, ShiftCommand, HistoryCommand, HelpCommand, SIZE_WORDS, PRICE_FIELDS, bracket_error)
+from marketData import RelativePrice
 from dotenv import load_dotenv
-
-from typing import Optional, Dict, Any, List
-from colorprint import ColorPrint
+import colorprint
+from colorprint import ColorPrint, OutputScope
+from consoleRenderer import ConsoleRenderer
 from colorama import Fore, Back, Style, init
 
 path = './keys.env'
@@ -23,175 +27,534 @@ logging.basicConfig(level=logging.INFO, format=(
     Fore.BLUE + '[+] ' + Style.RESET_ALL + '%(message)s '))
 
 
-def process_command(ftx, userInput):
-
-    commands = collections.deque()
-
-    for input in userInput.split(";"):
-        # [buy 1 @8500, sell 1 @8600]
-        commands.append(input.strip())
-
-    while commands:
-        currCommand = commands.popleft().split(" ")
+def process_command(ftx, userInput, command=None):
+    # The script runner may pass the line already parsed, e.g. a basket command bound to its markets
+    if command is not None:
+        return run_command(ftx, userInput, command)
+    # A repeated input, e.g. the same batch sent again, is split and parsed once
+    for accounts, line, command in parse_input(userInput):
+        if isinstance(command, ParseError):
+            cp.red(command)
+            continue
         try:
-            ######################
-            # -PLACING ORDER
-            ######################
-            if currCommand[0] == "buy" or currCommand[0] == "sell":
-                ftx.place_order_cleanup(currCommand)
-
-            ######################
-            # -PLACING CONDITIONAL ORDER
-            ######################
-
-            elif currCommand[0] == "stop" or currCommand[0] == "tp" or currCommand[0] == "trail":
-
-                ftx.place_conditional_order_cleanup(currCommand)
-
-            ######################
-            # -SHOW OPEN ORDERS
-            ######################
-            elif currCommand[0] == "order":
-                market = currCommand[1] if len(currCommand) > 1 else None
-                if market:
-                    ftx.get_open_orders(market)
-                elif not market and ftx.market:
-                    ftx.get_open_orders(ftx.market)
-                else:
-                    cp.red(
-                        f'Missing market to grab open orders, please reset instrument')
-
-            ######################
-            # -CANCEL ORDERS
-            ######################
-            elif currCommand[0] == "cancel":
-                cancel_type = currCommand[1] if len(currCommand) >= 2 else None
-                conditional_id = currCommand[2] if len(
-                    currCommand) >= 3 else None
-                # diff types of cancel
-
-                if ftx.market is not None:
-                    if cancel_type:
-                        if cancel_type == "conditional":
-                            if conditional_id:
-                                ftx.cancel_orders(
-                                    market_name=ftx.market, conditional_id=conditional_id)
-                            else:
-                                ftx.cancel_orders(
-                                    market_name=ftx.market, conditional_orders=True)
-                        elif cancel_type == "limit":
-                            ftx.cancel_orders(
-                                market_name=ftx.market, limit_orders=True)
-                        elif cancel_type.isnumeric():
-                            ftx.cancel_orders(
-                                market_name=ftx.market, cancel_id=cancel_type)
-                    else:
-                        ftx.cancel_orders(market_name=ftx.market)
-                else:
-                    cp.red(
-                        f'Missing market to delete orders, please reset instrument')
-            ######################
-            # -LOCKING INSTRUMENT
-            ######################
-            elif currCommand[0] == "instrument":
-                if len(currCommand) < 2:
-                    cp.green(f'Current MARKET: {ftx.market}')
-                elif currCommand[1]:
-                    ftx.market = currCommand[1].upper()
-                    cp.green(f'Assign new MARKET: {ftx.market}')
-
-            ######################
-            # -SET FATFINGER:
-            ######################
-            elif currCommand[0] == "fatfinger":
-                if len(currCommand) > 1:
-                    if currCommand[1]:
-                        ftx.fatFinger = float(currCommand[1])
-                        cp.green(f'fatFinger set: {ftx.fatFinger}')
-                    else:
-                        cp.red(
-                            f'Please input only digits for fatfinger: {currCommand[1]}')
-                else:
-                    cp.red(f'Missing the value for fatfinger')
-            ######################
-            # -SHOW OPEN POSITIONS
-            ######################
-            elif currCommand[0] == "position":
-                market = currCommand[1] if len(currCommand) > 1 else None
-
-                ftx.get_position(name=market)
-
-            ######################
-            # - SPLITTING ORDERS
-            # ! split [sell] [0.1] into [10] from [11288] to [11355]
-            ######################
-            elif currCommand[0] == "split":
-                side = currCommand[1] if len(currCommand) > 1 else None
-                size = currCommand[2] if len(currCommand) > 2 else None
-                total = float(currCommand[4]) if len(currCommand) > 4 else None
-                start = float(currCommand[6]) if len(currCommand) > 6 else None
-                end = float((currCommand[8])) if len(currCommand) > 7 else None
-                limitOrder = currCommand[9] if len(currCommand) > 8 else None
-                if len(currCommand) > 8:
-                    order_list = split_equal_parts(start, end, total)
-                    size = float(size) / total
-                    cp.green(order_list)
-                    if not None in (side, size, total, start, end):
-
-                        if side == "buy" or side == "sell":
-                            while total > 0 and len(order_list) > 0:
-
-                                ftx.place_order_cleanup(
-                                    [side, float(size), str(order_list.pop())])
-                                total -= 1
-                        elif side == "stop" or side == "tp" or side == "trail":
-
-                            while total > 0 and len(order_list) > 0:
-                                price = str(order_list.pop())
-
-                                ftx.place_conditional_order_cleanup(
-                                    [side, float(size), price, limitOrder, price])
-                                total -= 1
-                    else:
-                        cp.red(
-                            f'One of the values in split order is missing, please check your command: \n {currCommand}')
-
-                else:
-                    cp.red(
-                        f'Split order requires all 9 words typed out, please check your command: \n {currCommand}')
-
-            #######################
-            # - HELP COMMAND
-            #######################
-
-            elif currCommand[0] == "help" or currCommand[0] == "/help":
-                show_command()
-
+            if accounts:
+                fan_out(ftx, accounts, line)
             else:
-                cp.red(
-                    f'Error in process_command, please use only one of those command option: buy,sell,order,cancel,position,split')
-
+                dispatch(ftx, command)
         except Exception as e:
             cp.red(
-                f'Error in process_command, please restart your program:  {currCommand}  \n  {e} ')
+                f'Error in process_command, please restart your program:  {line}  \n  {e} ')
+
+
+def run_command(ftx, line, command):
+    try:
+        dispatch(ftx, command)
+    except Exception as e:
+        cp.red(
+            f'Error in process_command, please restart your program:  {line}  \n  {e} ')
+
+
+def dispatch(ftx, command):
+    # The parser marks bid/ask/mid prices, absolute commands go straight to their handler
+    if getattr(command, 'relative', False):
+        command = resolve_prices(ftx, command)
+    HANDLERS[type(command)](ftx, command)
+
+
+######################
+# -RELATIVE PRICES
+# ! buy 1 @bid-0.2% | split buy 1 into 5 from mid-1% to mid+1%
+######################
+def resolve_prices(ftx, command):
+    """Replace bid/ask/mid prices with absolute ones from the local orderbook"""
+    relative = {name: getattr(command, name) for name in PRICE_FIELDS.get(type(command), ())
+                if isinstance(getattr(command, name), RelativePrice)}
+    if not relative:
+        return command
+    resolved = {name: ftx.resolve_price(price) for name, price in relative.items()}
+    cp.cyan(', '.join(f'{relative[name]} = {value}' for name, value in resolved.items()))
+    command = command._replace(relative=False, **resolved)
+    error = bracket_error(command) if isinstance(command, BracketCommand) else None
+    if error:
+        raise ParseError(error)
+    return command
+
+
+######################
+# -SUBACCOUNT FAN-OUT
+# ! @acct1,acct2 [command]
+######################
+def fan_out(ftx, accounts, line):
+    """Run one command on several subaccounts at once, then one summary row per account"""
+    def run(name, client):
+        # Each subaccount trades the current market with the current fatfinger
+        view = client.for_market(ftx.market)
+        view.fatFinger = ftx.fatFinger
+        with OutputScope(name) as scope:
+            process_command(view, line)
+        return scope.errors
+
+    results = pool.broadcast(accounts, run)
+    failed = sum(1 for name, errors, seconds in results if errors)
+    cp.table(f'{line} on {len(accounts)} subaccounts, {failed} with errors', ('subaccount', 'errors', 'ms'),
+             [(name, errors, f'{seconds * 1000:.1f}') for name, errors, seconds in results],
+             'red' if failed else 'green')
+
+
+######################
+# -PLACING ORDER
+######################
+def handle_order(ftx, command):
+    ftx.place_order_cleanup(command.side, command.size, command.price)
+
+
+######################
+# -PLACING CONDITIONAL ORDER
+######################
+def handle_conditional(ftx, command):
+    ftx.place_conditional_order_cleanup(command.kind, command.size, command.trigger, command.side,
+                                        command.limit_price)
+
+
+######################
+# -SHOW OPEN ORDERS
+######################
+def handle_show_orders(ftx, command):
+    market = command.market or ftx.market
+    if market:
+        ftx.get_open_orders(market)
+    else:
+        cp.red(
+            f'Missing market to grab open orders, please reset instrument')
+
+
+######################
+# -CANCEL ORDERS
+######################
+def handle_cancel(ftx, command):
+    if ftx.market is None:
+        cp.red(
+            f'Missing market to delete orders, please reset instrument')
+    # Several IDs, a side or a price band go through the concurrent path
+    elif command.filtered or len(command.ids) > 1:
+        cancel_many(ftx, command)
+    elif command.ids and command.conditional:
+        ftx.cancel_orders(market_name=ftx.market,
+                          conditional_id=command.ids[0])
+    elif command.ids:
+        ftx.cancel_orders(market_name=ftx.market, cancel_id=command.ids[0])
+    elif command.conditional:
+        ftx.cancel_orders(market_name=ftx.market, conditional_orders=True)
+    elif command.limit:
+        ftx.cancel_orders(market_name=ftx.market, limit_orders=True)
+    else:
+        ftx.cancel_orders(market_name=ftx.market)
+
+
+######################
+# -LOCKING INSTRUMENT
+######################
+def handle_instrument(ftx, command):
+    if not command.market:
+        cp.green(f'Current MARKET: {ftx.market}')
+    else:
+        ftx.market = command.market
+        cp.green(f'Assign new MARKET: {ftx.market}')
+        # Open the connection pool before the first order needs it
+        ftx.connections.warm(ftx.market)
+        ftx.prefetch_book(ftx.market)
+        cp.green(f'Connection pool warmed: {ftx.connections.stats()}')
+
+
+######################
+# -REQUEST LATENCY STATS
+# ! stats | stats json [file] | stats reset
+######################
+def handle_stats(ftx, command):
+    if command.option == "json":
+        if command.path:
+            with open(command.path, "w") as f:
+                f.write(ftx.stats.to_json())
+            cp.green(f'Stats exported to {command.path}')
+        else:
+            cp.plain(ftx.stats.to_json())
+    elif command.option == "reset":
+        ftx.stats.reset()
+        cp.green('Stats reset')
+    else:
+        cp.green(f'Request latency:\n{ftx.stats.table()}')
+
+
+######################
+# -FILLS, ORDERS AND FUNDING HISTORY
+# ! history fills | history funding all 90
+######################
+# One store for every subaccount, rows are kept apart by account
+history_store = ColumnStore()
+
+
+def handle_history(ftx, command):
+    import numpy as np
+    market = ftx.market if command.market is None else None if command.market == 'all' else command.market
+    started = time.perf_counter()
+    columns = HistoryDownloader(ftx, history_store).query(command.kind, market, time.time() - command.days * 86400)
+    elapsed = (time.perf_counter() - started) * 1000
+    state = history_store.state(ftx._subaccount_name or 'main', command.kind, market)
+    title = (f'{len(columns["id"])} {command.kind} for {market or "all markets"} in the last {command.days:g} days, '
+             f'{state["rows"] if state else 0} stored, {elapsed:.1f} ms')
+    if not len(columns['id']):
+        cp.green(title)
+        return
+    names, group = np.unique(columns[KINDS[command.kind].market_field], return_inverse=True)
+    count = np.bincount(group)
+    if command.kind == 'fills':
+        volume = np.bincount(group, columns['price'] * columns['size'])
+        fees = np.bincount(group, columns['fee'])
+        cp.table(title, ('market', 'fills', 'volume', 'fees'),
+                 [(name, n, f'{v:.2f}', f'{f:.6f}') for name, n, v, f in zip(names, count, volume, fees)])
+    elif command.kind == 'orders':
+        filled = np.bincount(group, columns['filledSize'] > 0)
+        cp.table(title, ('market', 'orders', 'filled'),
+                 [(name, n, int(f)) for name, n, f in zip(names, count, filled)])
+    else:
+        payments = np.bincount(group, columns['payment'])
+        cp.table(title, ('future', 'payments', 'total'),
+                 [(name, n, f'{p:.6f}') for name, n, p in zip(names, count, payments)])
+
+
+######################
+# -CONNECTION POOL STATS
+######################
+def handle_pool(ftx, command):
+    cp.green(ftx.connections.stats())
+
+
+######################
+# -ORDERS WAITING FOR AN ACK
+######################
+def handle_inflight(ftx, command):
+    pending = ftx.inflight.pending()
+    if not pending:
+        cp.green('No orders in flight')
+        return
+    cp.table(f'{len(pending)} orders in flight', ('clientId', 'market', 'side', 'size', 'failures', 'status'),
+             [(order['clientId'], order['market'], order['side'], order['size'], order['failures'], order['status'])
+              for order in pending], 'yellow')
+
+
+######################
+# -SET FATFINGER:
+######################
+def handle_fatfinger(ftx, command):
+    ftx.fatFinger = command.value
+    cp.green(f'fatFinger set: {ftx.fatFinger}')
+
+
+######################
+# -SHOW OPEN POSITIONS
+######################
+def handle_position(ftx, command):
+    ftx.get_position(name=command.market)
+
+
+######################
+# - SPLITTING ORDERS
+# ! split [sell] [0.1] into [10] from [11288] to [11355] [linear/geometric/exponential] [equal/pyramid/front]
+######################
+def handle_split(ftx, command):
+    try:
+        info = ftx.market_info.get(ftx.market) or {}
+    except Exception as e:
+        info = {}
+        cp.yellow(
+            f'Unable to load market metadata, rungs not snapped to tick: {e}')
+    # Prices snapped to tick, sizes to size increment
+    prices, sizes = build_ladder(command.start, command.end, command.total, command.size, command.spacing,
+                                 command.skew, info.get('priceIncrement'), info.get('sizeIncrement'))
+    rungs = list(zip(prices.tolist(), sizes.tolist()))
+    cp.green(rungs)
+    if ftx.fatFinger is None or sizes.max() >= float(ftx.fatFinger):
+        cp.red(
+            f'Size order exceeds fatfinger: {ftx.fatFinger}, unable to place split order')
+    elif all(ftx.check_order(rung_size) for rung_size in set(sizes.tolist())):
+        if command.reconcile:
+            reconcile_ladder(ftx, command, rungs)
+        else:
+            bulk.report(bulk.submit([place_rung_job(ftx, command, price, rung_size)
+                                     for price, rung_size in rungs]))
+
+
+def place_rung_job(ftx, command, price, size):
+    if command.side in ORDER_SIDES:
+        return (f'{command.side} {size} @{price}', ftx.send_order,
+                {'market': ftx.market, 'side': command.side, 'size': size, 'price': price})
+    return (f'{command.side} {size} @{price}', ftx.send_conditional_order,
+            {'market': ftx.market, 'side': command.limit_side, 'size': size, 'type': CONDITIONAL_TYPES[command.side],
+             'triggerPrice': price, 'limit_price': price})
+
+
+######################
+# - RECONCILING A LADDER
+# ! split ... reconcile
+######################
+def reconcile_ladder(ftx, command, rungs):
+    """
+    Turn the open orders on the ladder's side into the new ladder with the
+    fewest requests: keep matching rungs, modify the rest in place and only
+    cancel or place the surplus, all concurrently
+    """
+    conditional = command.side not in ORDER_SIDES
+    side = command.limit_side if conditional else command.side
+    live = ftx.find_open_orders(ftx.market, conditional, side)
+    if conditional:
+        live = [order for order in live if order['type'] == CONDITIONAL_TYPES[command.side]]
+    diff = diff_ladder(rungs, live, 'triggerPrice' if conditional else 'price')
+
+    jobs = [(f'cancel {order["id"]} @{order["triggerPrice" if conditional else "price"]}', ftx.cancel_order_id,
+             {'order_id': order['id'], 'conditional': conditional}) for order in diff.cancel]
+    for order, price, size in diff.modify:
+        old_price = float(order['triggerPrice' if conditional else 'price'])
+        kwargs = {'existing_order_id': order['id'],
+                  'price': None if price == old_price else price,
+                  'size': None if size == remaining(order) else size}
+        if conditional and order.get('orderPrice') is not None and kwargs['price'] is not None:
+            kwargs['order_price'] = price
+        jobs.append((f'modify {order["id"]} {remaining(order)} @{old_price} -> {size} @{price}',
+                     ftx.send_modify_conditional_order if conditional else ftx.send_modify_order, kwargs))
+    jobs += [place_rung_job(ftx, command, price, size) for price, size in diff.place]
+
+    cp.green(f'Ladder diff: {len(diff.keep)} kept, {len(diff.modify)} modified, {len(diff.cancel)} cancelled, '
+             f'{len(diff.place)} placed - {diff.requests} requests instead of {len(live) + len(rungs)}')
+    if jobs:
+        bulk.report(bulk.submit(jobs))
+
+
+#######################
+# - BRACKET ORDER
+# ! bracket [buy/sell] [size] [@price] stop [@price] tp [@price]
+#######################
+def handle_bracket(ftx, command):
+    if ftx.market is None:
+        cp.red('Missing market to place bracket, please reset instrument')
+    elif ftx.fatFinger is None or command.size >= float(ftx.fatFinger):
+        cp.red(
+            f'Size order exceeds fatfinger: {ftx.fatFinger}, unable to place bracket')
+    elif ftx.check_order(command.size, command.price, command.stop, command.take_profit):
+        place_bracket(ftx, command)
+
+
+def place_bracket(ftx, command):
+    """
+    Entry, stop and take profit go out together, so the position is never
+    left unprotected for more than one round trip. If any leg fails the
+    other legs are cancelled, except a market entry which cannot be undone.
+    Returns one combined ack {leg: order}
+    """
+    close = "sell" if command.side == "buy" else "buy"
+    entry_type = "limit" if command.price is not None else "market"
+    legs = [('entry', ftx.send_order,
+             {'market': ftx.market, 'side': command.side, 'size': command.size,
+              'price': command.price, 'type': entry_type}),
+            ('stop', ftx.send_conditional_order,
+             {'market': ftx.market, 'side': close, 'size': command.size, 'type': 'stop',
+              'triggerPrice': command.stop}),
+            ('tp', ftx.send_conditional_order,
+             {'market': ftx.market, 'side': close, 'size': command.size, 'type': 'takeProfit',
+              'triggerPrice': command.take_profit})]
+    result = bulk.submit(legs)
+    ack = dict(result.acks)
+    if not result.errors:
+        cp.green(f'BRACKET {ftx.market} {command.side} {command.size} '
+                 f'{"@" + str(command.price) if command.price is not None else "market"} #{ack["entry"]["id"]} | '
+                 f'stop @{command.stop} #{ack["stop"]["id"]} | tp @{command.take_profit} #{ack["tp"]["id"]} '
+                 f'in {result.elapsed * 1000:.1f} ms')
+        return ack
+
+    for leg, error in result.errors:
+        cp.red(f'Bracket {leg} failed: {error}')
+    if 'entry' in ack and entry_type == 'market':
+        # The position exists, keep whatever protection did go through
+        cp.red('Market entry filled but the bracket is incomplete, position is NOT fully protected')
+        return ack
+    rollback = [(f'cancel {leg} {order["id"]}', ftx.cancel_order_id,
+                 {'order_id': order['id'], 'conditional': leg != 'entry'})
+                for leg, order in ack.items()]
+    if rollback:
+        cancelled = bulk.submit(rollback)
+        cp.yellow(f'Bracket rolled back: {cancelled.summary()}')
+        for label, error in cancelled.errors:
+            cp.red(f'{label} failed: {error}')
+    return ack
+
+
+#######################
+# - SHIFT ORDERS IN PLACE
+# ! shift [conditional] [buy/sell] [from [price 1] to [price 2]] [by [+-offset[%]]] [size [+-offset[%]]]
+#######################
+def handle_shift(ftx, command):
+    if ftx.market is None:
+        cp.red('Missing market to shift orders, please reset instrument')
+        return
+    orders = ftx.find_open_orders(ftx.market, command.conditional, command.side, command.low, command.high)
+    # (job, size after the shift) per order that actually moves
+    shifted = [item for item in (shift_job(ftx, command, order) for order in orders) if item is not None]
+    if not shifted:
+        cp.yellow(f'No open orders to shift, or the shift is below one tick: {command}')
+        return
+    resized = [size for (label, fn, kwargs), size in shifted if kwargs['size'] is not None]
+    if resized and (ftx.fatFinger is None or max(resized) >= float(ftx.fatFinger)):
+        cp.red(
+            f'Size order exceeds fatfinger: {ftx.fatFinger}, unable to shift orders')
+    elif all(ftx.check_order(size, kwargs['price']) for (label, fn, kwargs), size in shifted):
+        # One modify per order instead of a cancel plus a place, and no gap on the book
+        bulk.report(bulk.submit([job for job, size in shifted]))
+
+
+def shift_job(ftx, command, order):
+    """(modify job, size after the shift) for one order, None when the shift leaves it unchanged"""
+    def moved(value, offset, percent):
+        return value * (1 + offset / 100) if percent else value + offset
+
+    price_field = 'triggerPrice' if command.conditional else 'price'
+    kwargs = {'existing_order_id': order['id'], 'price': None, 'size': None}
+    if command.price_offset and order.get(price_field) is not None:
+        price = ftx.market_info.snap_price(ftx.market, moved(float(order[price_field]),
+                                                             command.price_offset, command.price_percent))
+        if price != float(order[price_field]):
+            kwargs['price'] = price
+        # A stop limit keeps its distance between trigger and limit price
+        if command.conditional and order.get('orderPrice') is not None and kwargs['price'] is not None:
+            kwargs['order_price'] = ftx.market_info.snap_price(ftx.market, float(order['orderPrice']) + price -
+                                                               float(order[price_field]))
+    # Resize what is left, a partly filled order keeps its filled part
+    remaining = float(order.get('remainingSize') or order['size'])
+    size = remaining
+    if command.size_offset:
+        size = ftx.market_info.snap_size(ftx.market, moved(remaining, command.size_offset, command.size_percent))
+        if size <= 0:
+            cp.yellow(f'Shift would leave order {order["id"]} without size, skipped')
+            return None
+        if size != remaining:
+            kwargs['size'] = size
+    if kwargs['price'] is None and kwargs['size'] is None:
+        return None
+    label = f'{order["side"]} {order["id"]} {remaining} @{order.get(price_field)} -> {size} @{kwargs["price"] or order.get(price_field)}'
+    return (label, ftx.send_modify_conditional_order if command.conditional else ftx.send_modify_order, kwargs), size
+
+
+#######################
+# - BASKETS
+# ! basket alts = SOL-PERP,AVAX-PERP:0.5 | basket alts [command] | basket [alts]
+#######################
+baskets = {}
+
+
+def handle_basket(ftx, command):
+    if command.line is not None:
+        # Markets come with the command when a script bound it to the basket at its line
+        markets = command.markets or baskets.get(command.name)
+        if markets is None:
+            cp.red(f'Unknown basket: {command.name}, baskets: {", ".join(baskets) or "none"}')
+        else:
+            run_basket(ftx, command.name, command.line, markets)
+    elif command.markets:
+        baskets[command.name] = command.markets
+        cp.green(f'Basket {command.name}: {basket_text(command.markets)}')
+    elif command.name is None:
+        for name, markets in baskets.items():
+            cp.green(f'Basket {name}: {basket_text(markets)}')
+        if not baskets:
+            cp.yellow('No baskets, create one with: basket alts = SOL-PERP,AVAX-PERP')
+    elif command.name not in baskets:
+        cp.red(f'Unknown basket: {command.name}, baskets: {", ".join(baskets) or "none"}')
+    else:
+        cp.green(f'Basket {command.name}: {basket_text(baskets[command.name])}')
+
+
+def basket_text(markets):
+    return ','.join(market if weight == 1 else f'{market}:{weight:g}' for market, weight in markets)
+
+
+def run_basket(ftx, name, line, markets):
+    """Run the command on every market of the basket at once, the size scaled by each market's weight"""
+    command = parse(line)
+    words = line.split()
+    index = SIZE_WORDS.get(type(command))
+
+    def run(market, weight):
+        view = ftx.for_market(market)
+        with OutputScope(market) as scope:
+            if index is None:
+                dispatch(view, command)
+            else:
+                size = float(words[index]) * weight
+                try:
+                    size = view.market_info.snap_size(market, size)
+                except Exception as e:
+                    cp.yellow(f'Unable to load market metadata, size not snapped: {e}')
+                scaled = ' '.join(words[:index] + [f'{size:.10g}'] + words[index + 1:])
+                dispatch(view, parse(scaled))
+        return scope.errors
+
+    # One worker per market, so the whole basket takes one round trip
+    result = BulkSubmitter(max_workers=len(markets)).submit(
+        [(market, run, {'market': market, 'weight': weight}) for market, weight in markets])
+    failed = sum(1 for market, errors in result.acks if errors) + len(result.errors)
+    cp.table(f'{line} on basket {name}: {result.total - failed}/{result.total} markets without errors '
+             f'in {result.elapsed * 1000:.1f} ms', ('market', 'errors'),
+             [(market, errors) for market, errors in result.acks] + result.errors,
+             'red' if failed else 'green')
+
+
+#######################
+# - HELP COMMAND
+#######################
+def handle_help(ftx, command):
+    show_command()
+
+
+CONDITIONAL_TYPES = {"stop": "stop", "tp": "takeProfit", "trail": "trailingStop"}
+
+HANDLERS = {
+    OrderCommand: handle_order,
+    ConditionalCommand: handle_conditional,
+    ShowOrdersCommand: handle_show_orders,
+    CancelCommand: handle_cancel,
+    InstrumentCommand: handle_instrument,
+    StatsCommand: handle_stats,
+    PoolCommand: handle_pool,
+    InflightCommand: handle_inflight,
+    BasketCommand: handle_basket,
+    ShiftCommand: handle_shift,
+    FatFingerCommand: handle_fatfinger,
+    PositionCommand: handle_position,
+    SplitCommand: handle_split,
+    BracketCommand: handle_bracket,
+    HistoryCommand: handle_history,
+    HelpCommand: handle_help,
+}
 
 ######################################
-# - Calculation for splitting order
+# - Cancel many orders by ID or filter
+# ! cancel [conditional] [id id ...] | [buy/sell] [from [price 1] to [price 2]]
 ######################################
 
 
-def split_equal_parts(start, end, total):
-    price = [start]
-    avg_price = round((end - start) / total, 4)
-
-    while total > 2:
-        curr = (start + avg_price)
-        price.append(curr)
-        start = curr
-        total -= 1
-    price.append(end)
-    return price
+def cancel_many(ftx, command):
+    ids = list(command.ids)
+    if command.filtered:
+        # Filters resolve against the own-order book, or the live open orders without it
+        matched = [str(order["id"]) for order in ftx.find_open_orders(
+            ftx.market, command.conditional, command.side, command.low, command.high)]
+        # IDs given together with a filter narrow it down
+        ids = [order_id for order_id in matched if order_id in ids] if ids else matched
 
+    if not ids:
+        cp.yellow(f'No open orders match: {command}')
+        return
+    jobs = [(f'cancel {"conditional " if command.conditional else ""}{order_id}', ftx.cancel_order_id,
+             {'order_id': order_id, 'conditional': command.conditional}) for order_id in ids]
+    bulk.report(bulk.submit(jobs))
 
 ######################################
 # - Commands for bot
@@ -208,20 +571,63 @@ def show_command():
                 stop limit - [type] [size] [price] [side] [limitPrice] - stop 1 @1 sell @1
                 take profit market - [type] [size] [price] - tp 1 @1
                 take profit limit - [type] [size] [price] [side] [limitPrice] - tp 1 @1 sell @1
+                (stop/tp without a side close the open position)
+            BRACKET ORDERS:
+                bracket [buy/sell] [size] [@price] stop [@price] tp [@price] - entry, stop and tp sent together
+                bracket buy 1 @1 stop @0.9 tp @1.2 (no entry price - market entry)
+            RELATIVE PRICES (from the live orderbook):
+                any price can be bid, ask or mid with an optional offset - buy 1 @bid-0.2%, sell 1 @ask+5
+                split buy 1 into 5 from mid-1% to mid+1%, bracket buy 1 @bid stop bid-1% tp ask+1%
             SPLIT ORDERS:
                 split [type] [size] into [total] from [price 1] to [price 2] [buy/sell] 
                 split order - split [sell] [0.1] into [10] from [11288] to [11355] (no buy/sell) 
                 split conditional order - split [stop/tp] [0.1] into [10] from [11288] to [11355] [buy/sell]
+                price spacing (optional) - linear (default), geometric, exponential
+                size skew (optional) - equal (default), pyramid (grows towards end price), front (shrinks towards end price)
+                split [sell] [1] into [10] from [11288] to [11355] geometric pyramid
+                split ... reconcile - turn the open orders on that side into this ladder,
+                    keeping matching rungs and modifying the rest, only the difference is sent
+            SHIFT ORDERS (modify in place, no cancel and re-split):
+                shift [conditional] [buy/sell] [from [price 1] to [price 2]] by [+-offset[%]] [size [+-offset[%]]]
+                shift by -0.5 - move every limit order 0.5 down
+                shift buy from 1.2 to 1.5 by +1% size -50% - move those bids 1% up and halve them
             CANCEL ORDERS:
                 cancel - cancel all orders
                 cancel limit - cancel all limit buy/sell
                 cancel conditional - cancel all stop/tp
                 cancel 123456 - cancel specific buy/sell limit order ID
                 cancel conditional 123456 - cancel specific stop/tp order ID
+                cancel 123 456 789 - cancel several limit order IDs at once
+                cancel conditional 123 456 - cancel several stop/tp order IDs at once
+                cancel [conditional] [buy/sell] [from 1.2 to 1.5] - cancel open orders matching side and/or price band
             SHOW ORDERS:
                 order - show all limit and stops open order
                 position  - show all current positions
-                position [market] - show specific market""")
+                position [market] - show specific market
+                pool - show connection pool stats
+                inflight - orders sent without an ack yet, resolved by clientId lookup
+            STATS:
+                stats - p50/p99/max latency per endpoint and phase, errors and rate limits
+                stats json [file] - export stats as JSON
+                stats reset - clear collected stats
+            HISTORY (stored under ./history, only what is missing is downloaded):
+                history fills [market/all] [days] - fills per market with volume and fees, default current market, 30 days
+                history orders [market/all] [days] - order history per market
+                history funding [future/all] [days] - funding payments per future
+            BASKETS:
+                basket alts = SOL-PERP,AVAX-PERP:0.5 - name a group of markets, :0.5 scales sizes for that market
+                basket alts [command] - run buy/sell/stop/tp/split/bracket/shift/cancel/order/position on every market at once
+                basket alts cancel - cancel all orders of every market in the basket
+                basket / basket alts - show baskets
+            SUBACCOUNTS:
+                @acct1,acct2 [command] - run the command on each subaccount concurrently, @main is the main account
+                @acct1,acct2 split [sell] [0.1] into [10] from [11288] to [11355]
+            SCRIPTS:
+                bulkCommand.py -c "cancel; position" - run commands once and exit
+                --quiet - only errors and bulk summaries, --json - one JSON object per line
+                bulkCommand.py --script open_ladders.txt (or pipe commands on stdin)
+                one command per line, lines for different markets run in parallel,
+                lines for the same market keep their order, [wait] finishes everything above it""")
 
 
 def main(ftx):
@@ -232,6 +638,8 @@ def main(ftx):
         try:
             while True:
 
+                # Everything queued so far goes out before the prompt
+                cp.flush()
                 userInput = input('Command: ')
                 break
             if userInput == 'quit':
@@ -242,14 +650,69 @@ def main(ftx):
             cp.red(f'Exception in calling main() {e}')
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='FTX bulk order bot')
+    parser.add_argument('--script', metavar='FILE',
+                        help='run commands from FILE ("-" for stdin) instead of the interactive prompt')
+    parser.add_argument('-c', '--command', metavar='COMMANDS',
+                        help='run ";" separated commands once and exit, e.g. -c "cancel; position"')
+    parser.add_argument('--timing', action='store_true',
+                        help='print cold start to first request time on exit')
+    parser.add_argument('--subaccount', help='subaccount for commands without an @ prefix')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--quiet', action='store_const', dest='output', const='quiet', default='color',
+                        help='only print errors and bulk summaries')
+    output.add_argument('--json', action='store_const', dest='output', const='json',
+                        help='print one JSON object per line')
+    return parser.parse_args(argv)
+
+
+def report_timing(ftx):
+    if ftx.first_request_at is None:
+        cp.yellow(f'No request sent, startup took {(time.perf_counter() - _STARTED) * 1000:.1f} ms')
+    else:
+        cp.yellow(
+            f'Cold start to first request: {(ftx.first_request_at - _STARTED) * 1000:.1f} ms')
+
+
+def run_script(ftx, script):
+    from scriptRunner import ScriptRunner
+    runner = ScriptRunner(ftx, process_command)
+    if script == '-':
+        runner.run(sys.stdin)
+    else:
+        with open(script) as f:
+            runner.run(f)
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    # Output is queued and rendered on its own thread, off the order path
+    colorprint.install(ConsoleRenderer(args.output))
     cp = ColorPrint()
-    ftx = FtxClient()
+    bulk = BulkSubmitter()
+    ftx = FtxClient(subaccount_name=args.subaccount)
+    pool = ClientPool(ftx)
     try:
-        main(ftx)
+        if args.command:
+            # One-shot: no banner and no position stream, position falls back to REST
+            process_command(ftx, args.command)
+        elif args.script:
+            run_script(ftx, args.script)
+        elif not sys.stdin.isatty():
+            # Piped commands, same as --script -
+            run_script(ftx, '-')
+        else:
+            ftx.start_position_stream()
+            ftx.start_order_stream()
+            ftx.market_data()
+            main(ftx)
     except Exception as ex:
         cp.red(ex.args)
     finally:
+        if args.timing:
+            report_timing(ftx)
+        cp.flush()
         exit()
 
 
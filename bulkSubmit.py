@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from colorprint import ColorPrint
+
+
+class BulkResult:
+    """
+    Per-job acks and errors of one bulk submission
+    """
+
+    def __init__(self) -> None:
+        self.acks: List[Tuple[str, dict]] = []
+        self.errors: List[Tuple[str, str]] = []
+        self.elapsed = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.acks) + len(self.errors)
+
+    def summary(self) -> str:
+        return f'{len(self.acks)}/{self.total} accepted, {len(self.errors)} failed in {self.elapsed * 1000:.1f} ms'
+
+
+class BulkSubmitter:
+    """
+    Sends a batch of order calls over a bounded thread pool.
+    Each job is (label, fn, kwargs), fn must raise on failure (send_order, send_conditional_order)
+    """
+
+    def __init__(self, max_workers: int = 8) -> None:
+        self.max_workers = max_workers
+        self.cp = ColorPrint()
+
+    def _run(self, job: Tuple[str, Callable[..., Any], Dict[str, Any]]) -> Tuple[str, Optional[dict], Optional[str]]:
+        label, fn, kwargs = job
+        try:
+            return label, fn(**kwargs), None
+        except Exception as e:
+            return label, None, str(e)
+
+    def submit(self, jobs: List[Tuple[str, Callable[..., Any], Dict[str, Any]]]) -> BulkResult:
+        result = BulkResult()
+        if not jobs:
+            return result
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            # map keeps the rung order of the ladder in the summary
+            for label, ack, error in pool.map(self._run, jobs):
+                if error is None:
+                    result.acks.append((label, ack))
+                else:
+                    result.errors.append((label, error))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def report(self, result: BulkResult) -> None:
+        """One table per bulk command, rendered off the order path when a renderer is installed"""
+        rows = [(label, 'ok', ack.get('id', '') if isinstance(ack, dict) else ack)
+                for label, ack in result.acks]
+        rows += [(label, 'failed', error) for label, error in result.errors]
+        self.cp.table(result.summary(), ('order', 'status', 'result'), rows,
+                      'red' if result.errors else 'green')
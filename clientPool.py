@@ -0,0 +1,49 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from ftxBulkOrder import FtxClient
+
+MAIN = 'main'
+
+
+class ClientPool:
+    """
+    One FtxClient per subaccount, each with its own session, signer, rate
+    limiter and stats, created on first use. `main` is the main account.
+    Market metadata is public, every client shares the one of the base client.
+    """
+
+    def __init__(self, base: FtxClient, max_workers: int = 8) -> None:
+        self.base = base
+        self.max_workers = max_workers
+        self._clients: Dict[str, FtxClient] = {base._subaccount_name or MAIN: base}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> FtxClient:
+        with self._lock:
+            client = self._clients.get(name)
+            if client is not None:
+                return client
+            client = FtxClient(subaccount_name='' if name == MAIN else name,
+                               codec=self.base.codec.name)
+            client.market_info = self.base.market_info
+            self._clients[name] = client
+        # Outside the lock, warming one subaccount does not hold up the others
+        client.connections.warm(self.base.connections.market or self.base.market)
+        return client
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._clients)
+
+    def broadcast(self, names: Tuple[str, ...], fn: Callable[[str, FtxClient], object]) -> List[Tuple[str, object, float]]:
+        """Run fn(name, client) for every subaccount concurrently, results as (name, result, seconds) in order"""
+        def run(name):
+            start = time.perf_counter()
+            result = fn(name, self.get(name))
+            return name, result, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as pool:
+            return list(pool.map(run, names))
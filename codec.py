@@ -0,0 +1,76 @@
+"""
+Pluggable JSON codecs for request bodies and responses. orjson or msgspec
+are used when installed, stdlib json otherwise. Typed decoding of order and
+position responses uses msgspec Structs, or attribute objects as fallback.
+Optional codecs are only imported when a client actually picks them.
+"""
+import json
+from importlib.util import find_spec
+from types import SimpleNamespace
+from typing import Any, Optional
+
+
+class JsonCodec:
+    name = 'json'
+
+    def dumps(self, obj: Any) -> bytes:
+        # Same output requests produces for json= bodies
+        return json.dumps(obj, allow_nan=False).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        import orjson
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+
+
+class MsgspecCodec:
+    name = 'msgspec'
+
+    def __init__(self) -> None:
+        import msgspec
+        self.dumps = msgspec.json.Encoder().encode
+        self.loads = msgspec.json.Decoder().decode
+
+
+CODECS = {'json': JsonCodec}
+if find_spec('orjson') is not None:
+    CODECS['orjson'] = OrjsonCodec
+if find_spec('msgspec') is not None:
+    CODECS['msgspec'] = MsgspecCodec
+
+
+def get_codec(name: Optional[str] = None):
+    """Named codec, or the fastest installed one: orjson, msgspec, then stdlib json"""
+    if name is not None:
+        if name not in CODECS:
+            raise ValueError(
+                f'Codec {name} is not available, installed: {list(CODECS)}')
+        return CODECS[name]()
+    for preferred in ('orjson', 'msgspec', 'json'):
+        if preferred in CODECS:
+            return CODECS[preferred]()
+
+
+############################
+# -TYPED DECODING
+############################
+
+def decode_typed(data: bytes, kind: str) -> list:
+    """Decode an orders or positions response into typed rows, raises on failure"""
+    if 'msgspec' in CODECS:
+        from typedResponses import decode
+        return decode(data, kind)
+    # Fallback without msgspec: same attribute access over plain objects
+    if kind not in ('orders', 'positions'):
+        raise KeyError(kind)
+    response = json.loads(data)
+    if not response['success']:
+        raise Exception(response.get('error'))
+    return [SimpleNamespace(**row) for row in response['result']]
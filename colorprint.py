@@ -1,23 +1,110 @@
+import threading
+
 from colorama import Fore, Style
 
+PREFIXES = {
+    'red': Fore.RED + Style.BRIGHT + '[!] ' + Style.RESET_ALL,
+    'green': Fore.GREEN + Style.BRIGHT + '[+] ' + Style.RESET_ALL,
+    'yellow': Fore.YELLOW + Style.BRIGHT + '[i] ' + Style.RESET_ALL,
+    'blue': Fore.BLUE + Style.BRIGHT + '[+] ' + Style.RESET_ALL,
+    'cyan': Fore.CYAN + Style.BRIGHT + '[*] ' + Style.RESET_ALL,
+}
+
+# Set by install(), every ColorPrint then queues instead of printing
+_renderer = None
+
+
+def install(renderer) -> None:
+    global _renderer
+    _renderer = renderer
+
+
+_local = threading.local()
+
+
+class OutputScope:
+    """
+    Tags everything printed by this thread with a label and counts its
+    errors, e.g. to tell apart the output of one subaccount in a fan-out
+    """
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.errors = 0
+
+    def __enter__(self) -> 'OutputScope':
+        self._outer = getattr(_local, 'scope', None)
+        _local.scope = self
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _local.scope = self._outer
+
+
+def _scoped(color: str, data):
+    scope = getattr(_local, 'scope', None)
+    if scope is None:
+        return data
+    if color == 'red':
+        scope.errors += 1
+    return f'[{scope.label}] {data}'
+
+
+def format_line(color: str, data) -> str:
+    return PREFIXES[color] + str(data)
+
+
+def format_table(title: str, columns, rows) -> str:
+    cells = [list(map(str, columns))] + [[str(value) for value in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    lines = ['  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+             for row in cells]
+    return '\n'.join([title] + ['    ' + line for line in lines])
+
 
 class ColorPrint:
     """
     Colorized Output Class
     """
 
+    def _emit(self, color, data):
+        data = _scoped(color, data)
+        if _renderer is None:
+            print(format_line(color, data))
+        else:
+            _renderer.emit(color, data)
+
     def red(self, data):
-        print(Fore.RED + Style.BRIGHT + '[!] ' + Style.RESET_ALL + str(data))
+        self._emit('red', data)
 
     def green(self, data):
-        print(Fore.GREEN + Style.BRIGHT + '[+] ' + Style.RESET_ALL + str(data))
+        self._emit('green', data)
 
     def yellow(self, data):
-        print(Fore.YELLOW + Style.BRIGHT +
-              '[i] ' + Style.RESET_ALL + str(data))
+        self._emit('yellow', data)
 
     def blue(self, data):
-        print(Fore.BLUE + Style.BRIGHT + '[+] ' + Style.RESET_ALL + str(data))
+        self._emit('blue', data)
 
     def cyan(self, data):
-        print(Fore.CYAN + Style.BRIGHT + '[*] ' + Style.RESET_ALL + str(data))
+        self._emit('cyan', data)
+
+    def plain(self, data):
+        """Unprefixed output, for JSON exports"""
+        if _renderer is None:
+            print(data)
+        else:
+            _renderer.emit('plain', data)
+
+    def table(self, title, columns, rows, color='green'):
+        """One compact table, title is printed as a color line above it"""
+        title = _scoped(color, title)
+        if _renderer is None:
+            print(format_line(color, format_table(title, columns, rows)))
+        else:
+            _renderer.table(title, columns, rows, color)
+
+    def flush(self):
+        """Wait until queued output is on screen, e.g. before prompting"""
+        if _renderer is not None:
+            _renderer.flush()
@@ -0,0 +1,446 @@
+"""
+Command grammar for bulkCommand. Each command word maps to a spec that
+tokenizes and parses the line once into an immutable, typed command.
+Parsed lines are cached, so replaying scripted batches re-uses them.
+"""
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from ladder import SKEWS, SPACINGS
+from marketData import RelativePrice
+
+# An absolute price, or one relative to the live book such as bid-0.2%
+Price = Union[float, RelativePrice]
+
+
+class ParseError(Exception):
+    """
+    Raised with a user facing message when a command does not match its grammar
+    """
+
+
+class OrderCommand(NamedTuple):
+    side: str
+    size: float
+    price: Optional[Price]
+    # Set at parse time when a price is bid/ask/mid based, absolute commands skip resolving
+    relative: bool = False
+
+
+class ConditionalCommand(NamedTuple):
+    kind: str
+    size: float
+    trigger: Price
+    side: Optional[str]
+    limit_price: Optional[Price]
+    relative: bool = False
+
+
+class ShowOrdersCommand(NamedTuple):
+    market: Optional[str]
+
+
+class CancelCommand(NamedTuple):
+    conditional: bool
+    limit: bool
+    ids: Tuple[str, ...]
+    side: Optional[str]
+    low: Optional[float]
+    high: Optional[float]
+
+    @property
+    def filtered(self) -> bool:
+        return self.side is not None or self.low is not None
+
+
+class InstrumentCommand(NamedTuple):
+    market: Optional[str]
+
+
+class FatFingerCommand(NamedTuple):
+    value: float
+
+
+class PositionCommand(NamedTuple):
+    market: Optional[str]
+
+
+class SplitCommand(NamedTuple):
+    side: str
+    size: float
+    total: int
+    start: Price
+    end: Price
+    limit_side: Optional[str]
+    spacing: str
+    skew: str
+    reconcile: bool = False
+    relative: bool = False
+
+
+class ShiftCommand(NamedTuple):
+    conditional: bool
+    side: Optional[str]
+    low: Optional[float]
+    high: Optional[float]
+    price_offset: float
+    price_percent: bool
+    size_offset: float
+    size_percent: bool
+
+
+class BracketCommand(NamedTuple):
+    side: str
+    size: float
+    price: Optional[Price]
+    stop: Price
+    take_profit: Price
+    relative: bool = False
+
+
+class StatsCommand(NamedTuple):
+    option: Optional[str]
+    path: Optional[str]
+
+
+class PoolCommand(NamedTuple):
+    pass
+
+
+class BasketCommand(NamedTuple):
+    name: Optional[str]
+    # A definition without line, with line the markets the script bound the command to
+    markets: Optional[Tuple[Tuple[str, float], ...]]
+    line: Optional[str]
+
+
+class InflightCommand(NamedTuple):
+    pass
+
+
+class HistoryCommand(NamedTuple):
+    kind: str
+    # None is the current market, 'all' every market
+    market: Optional[str]
+    days: float
+
+
+class HelpCommand(NamedTuple):
+    pass
+
+
+ORDER_SIDES = ('buy', 'sell')
+CONDITIONAL_KINDS = ('stop', 'tp', 'trail')
+# A trail value is an offset from the market, it cannot be laddered across prices
+SPLIT_SIDES = ORDER_SIDES + ('stop', 'tp')
+
+BASKET_COMMANDS = (OrderCommand, ConditionalCommand, CancelCommand, SplitCommand, BracketCommand,
+                   ShiftCommand, ShowOrdersCommand, PositionCommand)
+# Index of the size word, the one a basket weight scales
+SIZE_WORDS = {OrderCommand: 1, ConditionalCommand: 1, SplitCommand: 2, BracketCommand: 2}
+# Fields that may hold a RelativePrice
+PRICE_FIELDS = {OrderCommand: ('price',), ConditionalCommand: ('trigger', 'limit_price'),
+                SplitCommand: ('start', 'end'), BracketCommand: ('price', 'stop', 'take_profit')}
+
+_BRACKET = re.compile(
+    r'^bracket\s+(?P<side>\S+)\s+(?P<size>\S+)(\s+(?P<price>(?!stop\b)\S+))?\s+stop\s+(?P<stop>\S+)\s+tp\s+(?P<tp>\S+)\s*$')
+_SPLIT = re.compile(
+    r'^split\s+(?P<side>\S+)\s+(?P<size>\S+)\s+into\s+(?P<total>\S+)\s+from\s+(?P<start>\S+)\s+to\s+(?P<end>\S+)(?P<options>(\s+\S+)*)\s*$')
+
+
+_RELATIVE = re.compile(r'^@?(?P<ref>bid|ask|mid)(?:(?P<offset>[+-]\d+(?:\.\d+)?)(?P<percent>%)?)?$')
+
+
+def _price(word: str, what: str) -> Price:
+    # @8500, or relative to the book: @bid, @ask-0.5, mid+1%
+    match = _RELATIVE.match(word)
+    if match:
+        return RelativePrice(match['ref'], float(match['offset'] or 0), bool(match['percent']))
+    return _number(word, what)
+
+
+def _relative(*prices: Optional[Price]) -> bool:
+    return any(isinstance(price, RelativePrice) for price in prices)
+
+
+def _number(word: str, what: str) -> float:
+    try:
+        return float(word.replace('@', '', 1))
+    except ValueError:
+        raise ParseError(f'{what} must be a number, got: {word}')
+
+
+############################
+# -COMMAND SPECS
+############################
+
+def _order(words: List[str]) -> OrderCommand:
+    if len(words) < 2:
+        raise ParseError(
+            'Error in placing order, missing size or price entry.')
+    price = _price(words[2], 'price') if len(words) > 2 else None
+    return OrderCommand(words[0], _number(words[1], 'size'), price, isinstance(price, RelativePrice))
+
+
+def _conditional(words: List[str]) -> ConditionalCommand:
+    if len(words) < 3:
+        raise ParseError(
+            'Error in placing conditional order cleanup,need size and trigger price')
+    side = words[3] if len(words) > 3 else None
+    if side is not None and side not in ORDER_SIDES:
+        raise ParseError(f'Conditional order side must be buy or sell, got: {side}')
+    limit_price = _price(words[4], 'limit price') if len(words) > 4 else None
+    trigger = _price(words[2], 'trigger price')
+    return ConditionalCommand(words[0], _number(words[1], 'size'), trigger, side, limit_price,
+                              _relative(trigger, limit_price))
+
+
+def _show_orders(words: List[str]) -> ShowOrdersCommand:
+    return ShowOrdersCommand(words[1] if len(words) > 1 else None)
+
+
+def _band(args: List[str], words: List[str]) -> Tuple[Optional[float], Optional[float], List[str]]:
+    # from [price 1] to [price 2] anywhere in args -> (low, high, args without it)
+    if 'from' not in args:
+        return None, None, args
+    index = args.index('from')
+    if len(args) <= index + 3 or args[index + 2] != 'to':
+        raise ParseError(
+            f'Price band needs: from [price 1] to [price 2]: {words}')
+    low, high = sorted((_number(args[index + 1], 'price'),
+                        _number(args[index + 3], 'price')))
+    return low, high, args[:index] + args[index + 4:]
+
+
+def _cancel(words: List[str]) -> CancelCommand:
+    args = words[1:]
+    conditional = bool(args) and args[0] == 'conditional'
+    if conditional:
+        args = args[1:]
+    limit = args == ['limit']
+    if limit:
+        args = []
+    low, high, args = _band(args, words)
+    side = next((arg for arg in args if arg in ORDER_SIDES), None)
+    ids = tuple(arg for arg in args if arg.isnumeric())
+    unknown = [arg for arg in args if arg not in ORDER_SIDES and not arg.isnumeric()]
+    if unknown:
+        raise ParseError(f'Unknown cancel option: {unknown}')
+    return CancelCommand(conditional, limit, ids, side, low, high)
+
+
+def _offset(word: str, what: str) -> Tuple[float, bool]:
+    # +0.5 or -1% -> (offset, percent)
+    percent = word.endswith('%')
+    return _number(word[:-1] if percent else word, what), percent
+
+
+def _shift(words: List[str]) -> ShiftCommand:
+    # shift [conditional] [buy/sell] [from [price 1] to [price 2]] [by [+-offset[%]]] [size [+-offset[%]]]
+    args = words[1:]
+    conditional = bool(args) and args[0] == 'conditional'
+    if conditional:
+        args = args[1:]
+    low, high, args = _band(args, words)
+    offsets = {}
+    for key in ('by', 'size'):
+        if key in args:
+            index = args.index(key)
+            if len(args) <= index + 1:
+                raise ParseError(f'Shift {key} needs an offset such as +0.5 or -1%: {words}')
+            offsets[key] = _offset(args[index + 1], f'shift {key}')
+            args = args[:index] + args[index + 2:]
+    if not offsets:
+        raise ParseError(f'Shift needs: by [+-offset[%]] and/or size [+-offset[%]]: {words}')
+    side = next((arg for arg in args if arg in ORDER_SIDES), None)
+    unknown = [arg for arg in args if arg not in ORDER_SIDES]
+    if unknown:
+        raise ParseError(f'Unknown shift option: {unknown}')
+    return ShiftCommand(conditional, side, low, high, *offsets.get('by', (0.0, False)),
+                        *offsets.get('size', (0.0, False)))
+
+
+def _instrument(words: List[str]) -> InstrumentCommand:
+    return InstrumentCommand(words[1].upper() if len(words) > 1 else None)
+
+
+def _fatfinger(words: List[str]) -> FatFingerCommand:
+    if len(words) < 2:
+        raise ParseError('Missing the value for fatfinger')
+    try:
+        return FatFingerCommand(float(words[1]))
+    except ValueError:
+        raise ParseError(
+            f'Please input only digits for fatfinger: {words[1]}')
+
+
+def _position(words: List[str]) -> PositionCommand:
+    return PositionCommand(words[1] if len(words) > 1 else None)
+
+
+def _split(words: List[str]) -> SplitCommand:
+    match = _SPLIT.match(' '.join(words))
+    if not match:
+        raise ParseError(
+            f'Split order requires all 9 words typed out, please check your command: \n {words}')
+    side = match['side']
+    if side not in SPLIT_SIDES:
+        raise ParseError(f'Split side must be one of {SPLIT_SIDES}, got: {side}')
+    total = _number(match['total'], 'total')
+    if total < 1 or total != int(total):
+        raise ParseError(f'Split total must be a whole number of rungs, got: {match["total"]}')
+    options = match['options'].split()
+    limit_side = next((word for word in options if word in ORDER_SIDES), None)
+    spacing = next((word for word in options if word in SPACINGS), 'linear')
+    skew = next((word for word in options if word in SKEWS), 'equal')
+    reconcile = 'reconcile' in options
+    unknown = [word for word in options
+               if word not in ORDER_SIDES and word not in SPACINGS and word not in SKEWS and word != 'reconcile']
+    if unknown:
+        raise ParseError(f'Unknown split option: {unknown}')
+    if side in CONDITIONAL_KINDS and not limit_side:
+        raise ParseError(
+            f'Split conditional order requires a buy/sell side, please check your command: \n {words}')
+    start, end = _price(match['start'], 'start price'), _price(match['end'], 'end price')
+    return SplitCommand(side, _number(match['size'], 'size'), int(total), start, end, limit_side, spacing, skew,
+                        reconcile, _relative(start, end))
+
+
+def _bracket(words: List[str]) -> BracketCommand:
+    match = _BRACKET.match(' '.join(words))
+    if not match:
+        raise ParseError(
+            f'Bracket needs: bracket [buy/sell] [size] [@price] stop [@price] tp [@price], got: \n {words}')
+    side = match['side']
+    if side not in ORDER_SIDES:
+        raise ParseError(f'Bracket side must be buy or sell, got: {side}')
+    price = _price(match['price'], 'price') if match['price'] else None
+    stop, take_profit = _price(match['stop'], 'stop price'), _price(match['tp'], 'take profit price')
+    command = BracketCommand(side, _number(match['size'], 'size'), price, stop, take_profit,
+                             _relative(price, stop, take_profit))
+    # Relative prices are only known once resolved, the handler checks those
+    if not command.relative:
+        error = bracket_error(command)
+        if error:
+            raise ParseError(f'{error}, got: {words}')
+    return command
+
+
+def bracket_error(command: BracketCommand) -> Optional[str]:
+    # Long: stop below entry below take profit, short the other way round
+    low, high = (command.stop, command.take_profit) if command.side == 'buy' else (command.take_profit, command.stop)
+    if not low < high or (command.price is not None and not low < command.price < high):
+        return f'Bracket {command.side} needs {"stop < entry < tp" if command.side == "buy" else "tp < entry < stop"}'
+    return None
+
+
+def _basket(words: List[str]) -> BasketCommand:
+    # basket | basket alts | basket alts = SOL-PERP,AVAX-PERP:0.5 | basket alts [command]
+    if len(words) < 3:
+        return BasketCommand(words[1] if len(words) > 1 else None, None, None)
+    name = words[1]
+    if words[2] == '=':
+        markets = []
+        for item in filter(None, ''.join(words[3:]).split(',')):
+            market, _, weight = item.partition(':')
+            markets.append((market.upper(), _number(weight, 'basket weight') if weight else 1.0))
+        if not markets:
+            raise ParseError(f'Basket needs markets: basket {name} = SOL-PERP,AVAX-PERP:0.5')
+        return BasketCommand(name, tuple(markets), None)
+    line = ' '.join(words[2:])
+    if not isinstance(parse(line), BASKET_COMMANDS):
+        raise ParseError(f'Basket only runs buy/sell, stop/tp, split, bracket, shift, cancel, order and position, got: {line}')
+    return BasketCommand(name, None, line)
+
+
+HISTORY_KINDS = ('fills', 'orders', 'funding')
+
+
+def _history(words: List[str]) -> HistoryCommand:
+    # history fills | history funding all | history orders BTC-PERP 90
+    if len(words) < 2 or words[1] not in HISTORY_KINDS:
+        raise ParseError(f'History needs one of {", ".join(HISTORY_KINDS)}: history fills [market/all] [days]')
+    rest = words[2:]
+    days = _number(rest.pop(), 'days') if rest and rest[-1].replace('.', '', 1).isdigit() else 30.0
+    if len(rest) > 1:
+        raise ParseError(f'History needs: history {words[1]} [market/all] [days], got: {words}')
+    market = rest[0].upper() if rest else None
+    return HistoryCommand(words[1], 'all' if market == 'ALL' else market, days)
+
+
+def _stats(words: List[str]) -> StatsCommand:
+    return StatsCommand(words[1] if len(words) > 1 else None, words[2] if len(words) > 2 else None)
+
+
+SPECS: Dict[str, Callable[[List[str]], NamedTuple]] = {
+    'buy': _order,
+    'sell': _order,
+    'stop': _conditional,
+    'tp': _conditional,
+    'trail': _conditional,
+    'order': _show_orders,
+    'cancel': _cancel,
+    'instrument': _instrument,
+    'fatfinger': _fatfinger,
+    'position': _position,
+    'split': _split,
+    'bracket': _bracket,
+    'shift': _shift,
+    'basket': _basket,
+    'stats': _stats,
+    'history': _history,
+    'pool': lambda words: PoolCommand(),
+    'inflight': lambda words: InflightCommand(),
+    'help': lambda words: HelpCommand(),
+    '/help': lambda words: HelpCommand(),
+}
+
+
+@lru_cache(maxsize=4096)
+def parse(line: str) -> NamedTuple:
+    """Parse one command, raises ParseError"""
+    words = line.split()
+    if not words:
+        raise ParseError('Empty command')
+    spec = SPECS.get(words[0])
+    if spec is None:
+        raise ParseError(
+            f'Error in process_command, please use only one of those command option: {",".join(SPECS)}')
+    return spec(words)
+
+
+@lru_cache(maxsize=4096)
+def parse_line(line: str) -> Tuple[Optional[Tuple[str, ...]], str, NamedTuple]:
+    """(subaccounts or None, command text, command) of one line, one cache hit per repeated line, raises ParseError"""
+    accounts, body = split_accounts(line) if line[0] == '@' else (None, line)
+    return accounts, body, parse(body)
+
+
+@lru_cache(maxsize=1024)
+def parse_input(userInput: str) -> Tuple[Tuple[Optional[Tuple[str, ...]], str, Union[NamedTuple, ParseError]], ...]:
+    """parse_line of every command in the input, a failed line holds its ParseError in place of the command"""
+    parsed = []
+    for line in split_commands(userInput):
+        try:
+            parsed.append(parse_line(line))
+        except ParseError as e:
+            # Cached, so without the traceback and the frames it holds
+            parsed.append((None, line, e.with_traceback(None)))
+    return tuple(parsed)
+
+
+def split_accounts(line: str) -> Tuple[Optional[Tuple[str, ...]], str]:
+    """'@acct1,acct2 split ...' -> (('acct1', 'acct2'), 'split ...'), no prefix -> (None, line)"""
+    if not line.startswith('@'):
+        return None, line
+    prefix, _, rest = line.partition(' ')
+    accounts = tuple(dict.fromkeys(name for name in prefix[1:].split(',') if name))
+    if not accounts or not rest.strip():
+        raise ParseError(f'Subaccount prefix needs: @acct1,acct2 [command], got: {line}')
+    return accounts, rest.strip()
+
+
+def split_commands(userInput: str) -> List[str]:
+    # [buy 1 @8500, sell 1 @8600]
+    return [command for command in map(str.strip, userInput.split(';')) if command]
@@ -0,0 +1,132 @@
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from colorprint import ColorPrint
+from rateLimiter import RateLimiter
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts, per request, whether it opened a socket or reused one"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.opened = 0
+        self.reused = 0
+        self.in_use = 0
+        # Sockets seen so far, a socket the pool closes and drops leaves the set
+        self._sockets = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.in_use += 1
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+        sock = getattr(response.raw.connection, 'sock', None)
+        if sock is not None:
+            with self._lock:
+                if sock in self._sockets:
+                    self.reused += 1
+                else:
+                    self._sockets.add(sock)
+                    self.opened += 1
+        return response
+
+    def open_sockets(self) -> int:
+        with self._lock:
+            return sum(1 for sock in self._sockets if sock.fileno() != -1)
+
+    def idle_sockets(self) -> int:
+        with self._lock:
+            return max(0, sum(1 for sock in self._sockets if sock.fileno() != -1) - self.in_use)
+
+
+class ConnectionManager:
+    """
+    Sized keep-alive pool for the client session. warm() opens the
+    connections missing from `pool_size` up front so the first order skips
+    DNS/TCP/TLS, and a background thread re-probes the idle ones whenever
+    the client sits idle. Probes are reads and take rate limiter tokens.
+    """
+
+    def __init__(self, session: Session, endpoint: str, limiter: RateLimiter = None, pool_size: int = 10,
+                 keepalive_interval: float = 30.0) -> None:
+        self.session = session
+        self.endpoint = endpoint
+        self.limiter = limiter
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval
+        self.adapter = CountingAdapter(
+            pool_connections=1, pool_maxsize=pool_size)
+        session.mount(endpoint, self.adapter)
+        self.market: Optional[str] = None
+        self.last_activity = time.monotonic()
+        self.probes = 0
+        self.probe_errors = 0
+        self.last_warm_ms: Optional[float] = None
+        self._keepalive: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.cp = ColorPrint()
+
+    def touch(self) -> None:
+        self.last_activity = time.monotonic()
+
+    def _probe(self, _=None) -> None:
+        # Public, unsigned and cheap, only here to open or keep a socket alive
+        path = f'markets/{self.market}' if self.market else 'markets'
+        try:
+            if self.limiter is not None:
+                self.limiter.acquire('reads')
+            self.session.get(self.endpoint + path, timeout=10).close()
+            self.probes += 1
+        except Exception:
+            self.probe_errors += 1
+
+    def _probe_many(self, count: int) -> None:
+        # Concurrent, so each probe holds a different socket of the pool
+        if count <= 0:
+            return
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            list(pool.map(self._probe, range(count)))
+        self.last_warm_ms = (time.perf_counter() - start) * 1000
+        self.touch()
+
+    def warm(self, market: str = None) -> None:
+        """Open the connections the pool is still missing, one concurrent probe each"""
+        if market:
+            self.market = market
+        self._probe_many(self.pool_size - self.adapter.open_sockets())
+        if self._keepalive is None:
+            self._keepalive = threading.Thread(
+                target=self._keepalive_loop, name='keepalive', daemon=True)
+            self._keepalive.start()
+
+    def _keepalive_loop(self) -> None:
+        while not self._stop.wait(self.keepalive_interval / 2):
+            if time.monotonic() - self.last_activity >= self.keepalive_interval:
+                self._probe_many(self.adapter.idle_sockets())
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {'market': self.market,
+                'pool_size': self.pool_size,
+                'open': self.adapter.open_sockets(),
+                'idle': self.adapter.idle_sockets(),
+                'opened': self.adapter.opened,
+                'reused': self.adapter.reused,
+                'probes': self.probes,
+                'probe_errors': self.probe_errors,
+                'last_warm_ms': self.last_warm_ms,
+                'idle_for_s': round(time.monotonic() - self.last_activity, 1)}
@@ -0,0 +1,95 @@
+"""
+Console output off the order path. ColorPrint calls only queue the message;
+a background thread formats whatever is queued and writes it in one batch,
+so a slow terminal or SSH link never sits between two order requests.
+
+Modes:
+    color - same output as ColorPrint printing directly
+    quiet - errors, bulk summaries and the tables of bulks that had failures
+    json  - one JSON object per line, for piping into other tools
+"""
+import json
+import queue
+import sys
+import threading
+import time
+from typing import Optional, TextIO
+
+from colorprint import format_line, format_table
+
+MODES = ('color', 'quiet', 'json')
+LEVELS = {'red': 'error', 'yellow': 'info', 'green': 'ok', 'blue': 'ok', 'cyan': 'ok', 'plain': 'data'}
+
+
+class ConsoleRenderer:
+
+    def __init__(self, mode: str = 'color', stream: Optional[TextIO] = None, max_batch: int = 512) -> None:
+        if mode not in MODES:
+            raise ValueError(f'Unknown output mode: {mode}, use one of {MODES}')
+        self.mode = mode
+        self.stream = stream or sys.stdout
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._loop, name='console-renderer', daemon=True)
+        self._thread.start()
+
+    def emit(self, color: str, data) -> None:
+        # Formatting happens on the renderer thread, the caller only pays for the put
+        self._queue.put((color, data, None, time.time()))
+
+    def table(self, title: str, columns, rows, color: str = 'green') -> None:
+        self._queue.put((color, title, (tuple(columns), list(rows)), time.time()))
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until everything queued before this call is written"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    ############################
+    # -RENDERING
+    ############################
+
+    def _format(self, color: str, data, table, ts: float) -> Optional[str]:
+        if self.mode == 'json':
+            record = {'ts': round(ts, 3), 'level': LEVELS[color]}
+            if table is None:
+                record['message'] = data if isinstance(data, (dict, list)) else str(data)
+            else:
+                columns, rows = table
+                record['message'] = str(data)
+                record['rows'] = [dict(zip(columns, row)) for row in rows]
+            return json.dumps(record, default=str)
+        if self.mode == 'quiet':
+            if table is not None and color == 'green':
+                # A clean bulk collapses to its summary line
+                return format_line(color, data)
+            if table is None and color not in ('red', 'plain'):
+                return None
+        if color == 'plain':
+            return str(data)
+        if table is not None:
+            return format_line(color, format_table(data, *table))
+        return format_line(color, data)
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            flushes = [item for item in batch if isinstance(item, threading.Event)]
+            try:
+                lines = [line for line in (self._format(*item) for item in batch
+                                           if not isinstance(item, threading.Event)) if line is not None]
+                if lines:
+                    self.stream.write('\n'.join(lines) + '\n')
+                    self.stream.flush()
+            except Exception as e:
+                sys.stderr.write(f'Console renderer failed: {e}\n')
+            finally:
+                for done in flushes:
+                    done.set()
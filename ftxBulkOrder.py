@@ -1,18 +1,26 @@
-from requests import Request, Session, Response
+from requests import Request, Session, Response, PreparedRequest
+from requests.exceptions import ConnectionError, Timeout
 import time
-import collections
+import copy
 import datetime
-import json
 import logging
-import hmac
-import hashlib
 import os
+import random
+import threading
 from dotenv import load_dotenv
-import urllib
 from typing import Optional, Dict, Any, List
 from colorprint import ColorPrint
+from rateLimiter import RateLimiter, RateLimitError
+from marketCache import MarketCache
+from requestSigner import RequestSigner
+from connectionManager import ConnectionManager
+from latencyStats import LatencyStats
+from codec import get_codec, decode_typed
+from inflightOrders import InflightOrders
+from marketData import RelativePrice
 from colorama import Fore, Back, Style, init
 
+path = './keys.env'
 load_dotenv(dotenv_path=path, verbose=True)
 
 logging.basicConfig(level=logging.INFO, format=(
@@ -21,16 +29,37 @@ logging.basicConfig(level=logging.INFO, format=(
 
 class FtxClient:
     _ENDPOINT = 'https://ftx.com/api/'
+    # (connect, read) seconds, a hung order request becomes a retryable error
+    TIMEOUT = (3.05, 10)
+    ORDER_RETRIES = 3
 
-    def __init__(self, subaccount_name=None) -> None:
+    def __init__(self, subaccount_name=None, rate_limits=None, codec=None) -> None:
         self._session = Session()
+        self._limiter = RateLimiter(rate_limits)
+        self.connections = ConnectionManager(self._session, self._ENDPOINT, self._limiter)
+        self.stats = LatencyStats()
+        self.codec = get_codec(codec)
         self._api_key = os.getenv('')
         self._api_secret = os.getenv('')
-        self._subaccount_name = ""
+        self._subaccount_name = subaccount_name or ""
+        self._signer = None
         self.cp = ColorPrint()
         self.market = None
-        self.orderSide = None
         self.fatFinger = None
+        self.market_info = MarketCache(self)
+        self.position_store = None
+        self.order_book = None
+        # Websocket and market data, created on first use and shared with for_market views
+        self._streams: Dict[str, Any] = {}
+        self._streams_lock = threading.Lock()
+        self.first_request_at = None
+        self.inflight = InflightOrders()
+
+    def for_market(self, market: str) -> 'FtxClient':
+        """Shallow copy bound to another market, sharing session, limiter, caches and stats"""
+        view = copy.copy(self)
+        view.market = market
+        return view
 
     def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
         return self._request('GET', path, params=params)
@@ -41,36 +70,69 @@ class FtxClient:
     def _delete(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
         return self._request('DELETE', path, json=params)
 
-    def _request(self, method: str, path: str, **kwargs) -> Any:
-        request = Request(method, self._ENDPOINT + path, **kwargs)
-        # Apply hash to keys
-        self._sign_request(request)
-        # Send the request, similar to req.get() or req.post()
-        response = self._session.send(request.prepare())
-        # Clean up response
-        result = self._process_response(response)
+    def _request(self, method: str, path: str, decode: str = None, **kwargs) -> Any:
+        endpoint_class = self._limiter.endpoint_class(method, path)
+        endpoint = self.stats.endpoint(method, path)
+        clock = time.perf_counter
+        started = clock()
+        # Bodies go through the client codec instead of the stdlib json inside requests
+        body = kwargs.pop('json', None)
+        if body is not None:
+            kwargs['data'] = self.codec.dumps(body)
+            kwargs['headers'] = {'Content-Type': 'application/json'}
+        encoded = clock() - started
+        try:
+            for attempt in range(self._limiter.max_retries + 1):
+                # Wait for a token so bulk commands stay under the exchange budget
+                self._limiter.acquire(endpoint_class)
+                # Serialize once, sign and send the same prepared request
+                t0 = clock()
+                prepared = Request(method, self._ENDPOINT +
+                                   path, **kwargs).prepare()
+                t1 = clock()
+                # Apply hash to keys
+                self._sign_request(prepared)
+                t2 = clock()
+                # Send the request, similar to req.get() or req.post()
+                self.connections.touch()
+                if self.first_request_at is None:
+                    self.first_request_at = clock()
+                response = self._session.send(prepared, timeout=self.TIMEOUT)
+                t3 = clock()
+                self.stats.record(endpoint, 'serialize', t1 - t0 + encoded)
+                self.stats.record(endpoint, 'sign', t2 - t1)
+                self.stats.record(endpoint, 'network', t3 - t2)
+                if response.status_code != 429:
+                    break
+                # Rate limited, back off and re-sign with a fresh timestamp
+                self.stats.count_rate_limit(endpoint)
+                self._limiter.backoff(endpoint_class, attempt,
+                                      response.headers.get('Retry-After'))
+            else:
+                raise RateLimitError(
+                    f'{method} {path} still rate limited after {self._limiter.max_retries} retries')
+            # Clean up response
+            result = self._process_response(response, decode)
+            self.stats.record(endpoint, 'parse', clock() - t3)
+        except Exception:
+            self.stats.count_error(endpoint)
+            raise
+        self.stats.record(endpoint, 'total', clock() - started)
         return result
 
-    def _sign_request(self, request: Request) -> None:
-        ts = int(time.time() * 1000)
-        prepared = request.prepare()
-        signature_payload = f'{ts}{prepared.method}{prepared.path_url}'.encode(
-        )
-
-        if prepared.body:
-            signature_payload += prepared.body
-        signature = hmac.new(self._api_secret.encode(),
-                             signature_payload, 'sha256').hexdigest()
-        request.headers['FTX-KEY'] = self._api_key
-        request.headers['FTX-SIGN'] = signature
-        request.headers['FTX-TS'] = str(ts)
-        if self._subaccount_name:
-            request.headers['FTX-SUBACCOUNT'] = urllib.parse.quote(
-                self._subaccount_name)
-
-    def _process_response(self, response: Response) -> Any:
+    def _sign_request(self, prepared: PreparedRequest) -> None:
+        if self._signer is None:
+            self._signer = RequestSigner(
+                self._api_key, self._api_secret, self._subaccount_name)
+        prepared.headers.update(self._signer.headers(
+            prepared.method, prepared.path_url, prepared.body))
+
+    def _process_response(self, response: Response, decode: str = None) -> Any:
         try:
-            data = response.json()
+            if decode:
+                # Typed orders/positions, success is checked by the decoder
+                return decode_typed(response.content, decode)
+            data = self.codec.loads(response.content)
         except ValueError:
             response.raise_for_status()
             raise
@@ -85,6 +147,22 @@ class FtxClient:
     def list_markets(self) -> List[dict]:
         return self._get('markets')
 
+    def check_order(self, size: float, *prices: float) -> bool:
+        """Local tick/size check against cached market metadata, no round trip"""
+        try:
+            error = self.market_info.validate(self.market, size)
+            for price in filter(None, prices):
+                error = error or self.market_info.validate(
+                    self.market, size, float(price))
+        except Exception as e:
+            self.cp.yellow(
+                f'Unable to load market metadata, skipping local checks: {e}')
+            return True
+        if error:
+            self.cp.red(f'Order rejected locally: {error}')
+            return False
+        return True
+
     ############################
     # -CANCEL ORDERS
     ############################
@@ -99,6 +177,8 @@ class FtxClient:
                     result = self._delete(f'conditional_orders/{conditional_id}', {'market': market_name,
                                                                                    'conditionalOrdersOnly': conditional_orders,
                                                                                    'limitOrdersOnly': limit_orders, })
+                    if self.order_book is not None:
+                        self.order_book.remove(conditional_id)
 
                 except Exception as e:
                     self.cp.red(
@@ -110,11 +190,16 @@ class FtxClient:
                                                                       'conditionalOrdersOnly': conditional_orders,
                                                                       'limitOrdersOnly': limit_orders,
                                                                       })
+                        if self.order_book is not None:
+                            self.order_book.remove(cancel_id)
 
                     else:
                         result = self._delete(f'orders', {'market': market_name,
                                                           'conditionalOrdersOnly': conditional_orders,
                                                           'limitOrdersOnly': limit_orders, })
+                        if self.order_book is not None:
+                            self.order_book.remove_market(market_name, True if conditional_orders else
+                                                          False if limit_orders else None)
 
                 except Exception as e:
                     self.cp.red(
@@ -124,31 +209,75 @@ class FtxClient:
 
         except Exception as e:
             self.cp.red(f'Exception when calling cancel_orders: \n {e}')
+
+    def cancel_order_id(self, order_id: str, conditional: bool = False) -> dict:
+        """Raw single cancel, raises on failure so bulk callers can collect errors"""
+        result = self._delete(f'conditional_orders/{order_id}' if conditional else f'orders/{order_id}')
+        if self.order_book is not None:
+            self.order_book.remove(order_id)
+        return result
+
+    ############################
+    # -HISTORY
+    ############################
+
+    def get_fills(self, market: str = None, start_time: float = None, end_time: float = None) -> List[dict]:
+        """Raw fills page, newest first, times are unix seconds"""
+        return self._get('fills', {'market': market, 'start_time': start_time, 'end_time': end_time})
+
+    def get_order_history(self, market: str = None, start_time: float = None, end_time: float = None) -> List[dict]:
+        return self._get('orders/history', {'market': market, 'start_time': start_time, 'end_time': end_time})
+
+    def get_funding_payments(self, future: str = None, start_time: float = None,
+                             end_time: float = None) -> List[dict]:
+        return self._get('funding_payments', {'future': future, 'start_time': start_time, 'end_time': end_time})
+
     ############################
     # -GET OPEN ORDER
     ############################
 
+    def list_open_orders(self, market: str = None, conditional: bool = False, remote: bool = False) -> List[dict]:
+        """Raw open limit or conditional orders, from the own-order book when it is live, no printing"""
+        if not remote and self._order_book_ready():
+            return self.order_book.orders(market, conditional)
+        return self._get('conditional_orders' if conditional else 'orders', {'market': market})
+
+    def find_open_orders(self, market: str, conditional: bool = False, side: str = None,
+                         low: float = None, high: float = None) -> List[dict]:
+        """Open orders by side and/or price band [low, high], price is the trigger price for conditionals"""
+        if self._order_book_ready():
+            return self.order_book.orders(market, conditional, side, low, high)
+        price_field = 'triggerPrice' if conditional else 'price'
+        return [order for order in self.list_open_orders(market, conditional, remote=True)
+                if (side is None or order['side'] == side)
+                and (low is None or (order.get(price_field) is not None and low <= float(order[price_field]) <= high))]
+
     def get_open_orders(self, market: str = None) -> List[dict]:
         try:
-            open = self._get(f'orders', {'market': market})
-            conditional = self.get_open_conditional_orders(market)
-            if not open:
-                self.cp.green(f'No orders available for {market}')
+            if self._order_book_ready():
+                open = self.order_book.orders(market, False)
+                conditional = self.order_book.orders(market, True)
             else:
-                for item in open:
-                    self.cp.green(
-                        f"""{item['type']} order-market: {item['market']},size: {item['size']},price: {item['price']},side: {item['side']},reduceOnly: {item['reduceOnly']}""")
-
-            if not conditional:
+                open = self._get(f'orders', {'market': market})
+                conditional = self.get_open_conditional_orders(market) or []
+            rows = [(item['id'], item['type'], item['side'], item['size'], item['price'], '', item['reduceOnly'])
+                    for item in open]
+            rows += [(item['id'], item['type'], item['side'], item['size'], item['orderPrice'], item['triggerPrice'],
+                      item['reduceOnly']) for item in conditional]
+            if not rows:
                 self.cp.green(f'No orders available for {market}')
             else:
-                for item in conditional:
-                    self.cp.green(
-                        f"""{item['type']} order:market: {item['market']},size: {item['size']},price: {item['orderPrice']},side: {item['side']},reduceOnly: {item['reduceOnly']}""")
+                self.cp.table(f'{len(open)} limit and {len(conditional)} conditional orders in {market}',
+                              ('id', 'type', 'side', 'size', 'price', 'trigger', 'reduceOnly'), rows)
         except Exception as e:
             self.cp.red(
                 f'Exception when calling get_open_orders: \n {e}')
 
+    def list_open_orders_typed(self, market: str = None, conditional: bool = False) -> list:
+        """Open limit or conditional orders decoded into typed objects, raises on failure"""
+        return self._request('GET', 'conditional_orders' if conditional else 'orders', decode='orders',
+                             params={'market': market})
+
     ############################
     # -GET OPEN CONDITIONAL ORDER
     ############################
@@ -171,12 +300,86 @@ class FtxClient:
         except Exception as e:
             self.cp.red(f'Exception when calling get_positions: \n {e}')
 
+    def _websocket(self):
+        # One private stream shared by the position store and the own-order book
+        with self._streams_lock:
+            if 'ws' not in self._streams:
+                # Imported here so one-shot runs never load the websocket client
+                from ftxWebsocket import FtxWebsocketClient
+                self._streams['ws'] = FtxWebsocketClient(self._api_key, self._api_secret, self._subaccount_name)
+            return self._streams['ws']
+
+    def market_data(self):
+        """Local orderbooks, subscribed per market on first use"""
+        ws = self._websocket()
+        with self._streams_lock:
+            if 'market_data' not in self._streams:
+                from marketData import MarketData
+                self._streams['market_data'] = MarketData(ws)
+            return self._streams['market_data']
+
+    def prefetch_book(self, market: str) -> None:
+        """Subscribe to the orderbook ahead of the first relative price, only once market data runs"""
+        if 'market_data' in self._streams:
+            self._streams['market_data'].subscribe(market)
+
+    def resolve_price(self, price, market: str = None) -> float:
+        """Absolute prices pass through, relative ones resolve from the local book, snapped to tick"""
+        if not isinstance(price, RelativePrice):
+            return price
+        market = market or self.market
+        try:
+            value = price.resolve(self.market_data().book(market))
+        except IndexError:
+            raise Exception(f'Orderbook for {market} has no {price.ref}')
+        try:
+            return self.market_info.snap_price(market, value)
+        except Exception as e:
+            self.cp.yellow(f'Unable to load market metadata, price not snapped to tick: {e}')
+            return value
+
+    def start_position_stream(self, reconcile_interval: float = 30.0) -> None:
+        """Keep positions in memory from the fills stream, position then never hits REST"""
+        from positionStore import PositionStore
+        self.position_store = PositionStore(self, self._websocket(), reconcile_interval)
+        self.position_store.start()
+
+    def _position_store_ready(self) -> bool:
+        return self.position_store is not None and self.position_store.ready.is_set()
+
+    def start_order_stream(self, reconcile_interval: float = 30.0) -> None:
+        """Keep our open orders in memory from the orders stream, order and cancel filters then never hit REST"""
+        from ownOrders import OwnOrderBook
+        self.order_book = OwnOrderBook(self, self._websocket(), reconcile_interval)
+        self.order_book.start()
+
+    def _order_book_ready(self) -> bool:
+        return self.order_book is not None and self.order_book.ready.is_set()
+
+    def get_positions_typed(self, show_avg_price: bool = False) -> list:
+        """Positions decoded straight into typed objects, raises on failure"""
+        return self._request('GET', 'positions', decode='positions', params={'showAvgPrice': show_avg_price})
+
+    def closing_side(self, market: str) -> str:
+        """Side that reduces the open position in market, raises when flat"""
+        if self._position_store_ready():
+            position = self.position_store.get(market)
+        else:
+            position = next(
+                filter(lambda x: x['future'] == market.upper(), self._get('positions')), None)
+        if not position or not float(position['netSize']):
+            raise Exception(f'No open position in {market}')
+        return 'sell' if float(position['netSize']) > 0 else 'buy'
+
     def get_position(self, name: str, show_avg_price: bool = False) -> dict:
         try:
             if name:
                 try:
-                    result = next(
-                        filter(lambda x: x['future'] == name.upper(), self.get_positions(show_avg_price)), None)
+                    if self._position_store_ready():
+                        result = self.position_store.get(name)
+                    else:
+                        result = next(
+                            filter(lambda x: x['future'] == name.upper(), self.get_positions(show_avg_price)), None)
                     self.cp.green(f"""Current position:
                                     market: {result['future']},
                                     entryPrice: {result['entryPrice']},
@@ -190,7 +393,8 @@ class FtxClient:
                     self.cp.red(f'Cannot find the position with: {name}')
 
             else:
-                results = self.get_positions(show_avg_price)
+                results = self.position_store.all() if self._position_store_ready(
+                ) else self.get_positions(show_avg_price)
                 for result in results:
                     if float(result['size']) > 0 and float(result['openSize']) > 0:
                         self.cp.green(f"""Current position:
@@ -209,22 +413,29 @@ class FtxClient:
     # -PLACE ORDER
     ############################
 
+    def send_order(self, market: str, side: str, size: float, type: str = 'limit',
+                   price: float = None, clientId: str = None, reduce_only: bool = False, ioc: bool = False, post_only: bool = False) -> dict:
+        """Raw order POST, raises on failure so bulk callers can collect errors"""
+        return self._send_idempotent('orders', {'market': market,
+                                                'side': side,
+                                                'price': price,
+                                                'size': size,
+                                                'type': type,
+                                                'reduceOnly': reduce_only,
+                                                'ioc': ioc,
+                                                'postOnly': post_only,
+                                                'clientId': clientId or self.inflight.new_client_id(),
+                                                }, self._find_order)
+
     def place_order(self, market: str, side: str, size: float, type: str = 'limit',
                     price: float = None, clientId: str = None, reduce_only: bool = False, ioc: bool = False, post_only: bool = False) -> dict:
         # cp.green(f'Place Order: {market},{side}, {size}, {price}, {type}')
         try:
-            result = self._post('orders', {'market': market,
-                                           'side': side,
-                                           'price': price,
-                                           'size': size,
-                                           'type': type,
-                                           'reduceOnly': reduce_only,
-                                           'ioc': ioc,
-                                           'postOnly': post_only,
-                                           'clientId': clientId,
-                                           })
+            result = self.send_order(market=market, side=side, size=size, type=type, price=price,
+                                     clientId=clientId, reduce_only=reduce_only, ioc=ioc, post_only=post_only)
             self.cp.green(
                 f"""{result['type'].upper()} order-market: {result['market']},size: {result['size']},price: {result['price']},side: {result['side']}""")
+            return result
 
         except Exception as e:
             self.cp.red(f'Exception when calling place_order: \n {e}')
@@ -233,6 +444,96 @@ class FtxClient:
     # -PLACE CONDITIONAL ORDER
     ############################
 
+    def send_conditional_order(
+            self, market: str, side: str, size: float, type: str,
+            triggerPrice: float = None, clientId: str = None, limit_price: float = None, reduce_only: bool = True, cancel: bool = True,
+            trail_value: float = None) -> dict:
+        """Raw conditional order POST, raises on failure so bulk callers can collect errors"""
+        if type not in ('stop', 'takeProfit', 'trailingStop'):
+            raise ValueError(f'Unknown conditional order type: {type}')
+        if type == 'trailingStop' and (triggerPrice is not None or trail_value is None):
+            raise ValueError('Trailing stops need a trail value and cannot take a trigger price')
+        if type != 'trailingStop' and triggerPrice is None:
+            raise ValueError('Need trigger prices for stop losses and take profits')
+        body = {'market': market, 'side': side, 'triggerPrice': triggerPrice,
+                'size': size, 'reduceOnly': reduce_only, 'type': type,
+                'cancelLimitOnTrigger': cancel, 'orderPrice': limit_price,
+                'clientId': clientId or self.inflight.new_client_id()}
+        if trail_value is not None:
+            body['trailValue'] = trail_value
+        return self._send_idempotent('conditional_orders', body, self._find_conditional_order)
+
+    ############################
+    # -IDEMPOTENT RETRIES
+    ############################
+
+    def _send_idempotent(self, path: str, body: dict, lookup) -> dict:
+        """
+        POST an order tagged with its clientId. After a network error the
+        outcome is unknown, so the order is looked up by clientId first and
+        only sent again when it did not land. Exchange rejections raise at once,
+        after a network error the order is then left in the inflight table as unknown.
+        """
+        client_id = body['clientId']
+        sent_at = time.time()
+        self.inflight.add(client_id, path, body)
+        for attempt in range(self.ORDER_RETRIES + 1):
+            try:
+                if attempt:
+                    found = lookup(body, sent_at)
+                    if found is not None:
+                        self.inflight.done(client_id)
+                        if self.order_book is not None:
+                            self.order_book.apply_ack(found, path == 'conditional_orders')
+                        return found
+                result = self._post(path, body)
+            except (ConnectionError, Timeout) as e:
+                error = e
+                self.inflight.retry(client_id, e)
+                time.sleep(min(self._limiter.max_backoff,
+                               self._limiter.base_backoff * 2 ** attempt) * random.uniform(1, 1.5))
+                continue
+            except Exception as e:
+                if attempt:
+                    # An earlier send may still have landed, the order stays in the table as unknown
+                    self.inflight.retry(client_id, e)
+                else:
+                    self.inflight.done(client_id)
+                raise
+            self.inflight.done(client_id)
+            if self.order_book is not None:
+                self.order_book.apply_ack(result, path == 'conditional_orders')
+            return result
+        # Left in the inflight table as unknown, see the inflight command
+        raise Exception(
+            f'{path} {client_id} outcome unknown after {self.ORDER_RETRIES} retries: {error}')
+
+    def _find_order(self, body: dict, sent_at: float) -> Optional[dict]:
+        try:
+            return self._get(f'orders/by_client_id/{body["clientId"]}')
+        except Exception as e:
+            if 'not found' in str(e).lower():
+                return None
+            raise
+
+    def _find_conditional_order(self, body: dict, sent_at: float) -> Optional[dict]:
+        # Trigger orders cannot be fetched by clientId, match an identical one created since the first send
+        def same(order):
+            return (order['type'] == body['type'] and order['side'] == body['side']
+                    and float(order['size']) == float(body['size'])
+                    # A trailing stop's trigger price moves with the market, its trail value does not
+                    and (float(order.get('trailValue') or 0) == float(body['trailValue'])
+                         if body['type'] == 'trailingStop'
+                         else float(order['triggerPrice'] or 0) == float(body['triggerPrice'] or 0))
+                    and datetime.datetime.fromisoformat(order['createdAt']).timestamp() >= sent_at - 1)
+        matches = [order for order in self._get('conditional_orders', {'market': body['market']}) if same(order)]
+        if not matches:
+            # A stop that triggered or was cancelled since is only in the history
+            matches = [order for order in self._get('conditional_orders/history',
+                                                    {'market': body['market'], 'start_time': int(sent_at - 1)})
+                       if same(order)]
+        return max(matches, key=lambda order: order['id']) if matches else None
+
     def place_conditional_order(
             self, market: str, side: str, size: float, type: str,
             triggerPrice: float = None, clientId: str = None, limit_price: float = None, reduce_only: bool = True, cancel: bool = True,
@@ -243,125 +544,128 @@ class FtxClient:
         To send a Take Profit Market order, set type='trailing_stop' and supply a trigger_price
         To send a Trailing Stop order, set type='trailing_stop' and supply a trail_value
         """
-        assert type in ('stop', 'takeProfit', 'trailingStop')
-        assert triggerPrice is not None, \
-            self.cp.red('Need trigger prices for stop losses and take profits')
-        assert type not in ('trailingStop',) or (triggerPrice is None and trail_value is not None), \
-            self.cp.red(
-                'Trailing stops need a trail value and cannot take a trigger price')
-
         try:
-            result = self._post('conditional_orders',
-                                {'market': market, 'side': side, 'triggerPrice': triggerPrice,
-                                 'size': size, 'reduceOnly': reduce_only, 'type': type,
-                                 'cancelLimitOnTrigger': cancel, 'orderPrice': limit_price, 'clientId': clientId})
+            # send_conditional_order checks the type against the trigger price and trail value
+            result = self.send_conditional_order(market=market, side=side, size=size, type=type, triggerPrice=triggerPrice,
+                                                 clientId=clientId, limit_price=limit_price, reduce_only=reduce_only, cancel=cancel,
+                                                 trail_value=trail_value)
             self.cp.green(f"""{result['type'].upper()} order- market: {result['market']},size: {result['size']},triggerPrice: {result['triggerPrice']}, limitPrice: {result['orderPrice']},side: {result['side']},reduceOnly: {result['reduceOnly']},orderType: {result['orderType']}""")
+            return result
 
         except Exception as e:
             self.cp.red(
                 f'Exception when calling place_conditional_order: \n {e}')
 
-    ##############################
-    # -ORDER CLEANUP
-    ###############################
-    def place_order_cleanup(self, currCommand):
+    ############################
+    # -MODIFY ORDER
+    ############################
 
-        try:
+    def send_modify_order(self, existing_order_id: Optional[str] = None, price: Optional[float] = None,
+                          size: Optional[float] = None, existing_client_order_id: Optional[str] = None) -> dict:
+        """
+        Raw modify POST, raises on failure. The exchange replaces the order in
+        one request and acks the replacement, which has a new id
+        """
+        assert (existing_order_id is None) ^ (existing_client_order_id is None), \
+            'Must supply exactly one ID for the order to modify'
+        path = f'orders/{existing_order_id}/modify' if existing_order_id is not None else \
+            f'orders/by_client_id/{existing_client_order_id}/modify'
+        result = self._post(path, {
+            **({'size': size} if size is not None else {}),
+            **({'price': price} if price is not None else {}),
+            'clientId': existing_client_order_id or self.inflight.new_client_id(),
+        })
+        if self.order_book is not None:
+            replaced = existing_order_id or (self.order_book.by_client_id(existing_client_order_id) or {}).get('id')
+            if replaced is not None:
+                self.order_book.remove(replaced)
+            self.order_book.apply_ack(result)
+        return result
 
-            side = currCommand[0] if len(currCommand) > 0 else None
-            self.orderSide = side
-            size = float(currCommand[1]) if len(currCommand) > 1 else 0
+    def modify_order(self, existing_order_id: Optional[str] = None, price: Optional[float] = None,
+                     size: Optional[float] = None, existing_client_order_id: Optional[str] = None) -> dict:
+        try:
+            result = self.send_modify_order(existing_order_id, price, size, existing_client_order_id)
+            self.cp.green(f"""{result['type']} has modified: market: {result['market']},size: {result['size']},price: {result['price']},side: {result['side']},id: {result['id']}""")
+            return result
+        except Exception as e:
+            self.cp.red(
+                f'Exception when calling modify_order: \n {e}')
+
+    def send_modify_conditional_order(self, existing_order_id: str, price: Optional[float] = None,
+                                      size: Optional[float] = None, order_price: Optional[float] = None) -> dict:
+        """Raw trigger order modify, price is the trigger price and order_price the limit price of a stop limit"""
+        result = self._post(f'conditional_orders/{existing_order_id}/modify', {
+            **({'size': size} if size is not None else {}),
+            **({'triggerPrice': price} if price is not None else {}),
+            **({'orderPrice': order_price} if order_price is not None else {}),
+        })
+        if self.order_book is not None:
+            self.order_book.remove(existing_order_id)
+            self.order_book.apply_ack(result, conditional=True)
+        return result
 
-            if len(currCommand) > 2:
-                if "@" in currCommand[2]:
-                    price = currCommand[2].replace('@', '')
-                else:
-                    price = currCommand[2]
-            else:
-                price = None
+    def modify_conditional_order(self, existing_order_id: str, price: Optional[float] = None,
+                                 size: Optional[float] = None, order_price: Optional[float] = None) -> dict:
+        try:
+            result = self.send_modify_conditional_order(existing_order_id, price, size, order_price)
+            self.cp.green(f"""{result['type']} has modified: market: {result['market']},size: {result['size']},price: {result['triggerPrice']},side: {result['side']},id: {result['id']}""")
+            return result
+        except Exception as e:
+            self.cp.red(
+                f'Exception when calling modify_conditional_order: \n {e}')
 
-            type = "limit" if len(currCommand) > 2 else "market"
+    ##############################
+    # -ORDER CLEANUP
+    ###############################
+    def place_order_cleanup(self, side: str, size: float, price: Optional[float] = None) -> None:
+        """Limit order at price, market order without one, after the fatfinger and local checks"""
+        try:
+            type = "limit" if price is not None else "market"
             self.cp.green(f'{side},{size},{price},{type}')
-            if size:
-                if float(size) < float(self.fatFinger):
-
-                    if price and type == "limit":
-
-                        self.place_order(market=self.market, side=side,
-                                         size=size, price=price, type=type)
-                    else:
-
-                        self.place_order(
-                            market=self.market, side=side, size=size, type=type)
-                else:
-                    self.cp.red(
-                        f'Size order exceeds fatfinger: {self.fatFinger}, unable to place order')
-            else:
+            if not size:
                 self.cp.red(
                     f'Error in placing order, missing size or price entry.')
+            elif float(size) >= float(self.fatFinger):
+                self.cp.red(
+                    f'Size order exceeds fatfinger: {self.fatFinger}, unable to place order')
+            elif self.check_order(size, price):
+                self.place_order(market=self.market, side=side,
+                                 size=size, price=price, type=type)
         except Exception as e:
             self.cp.red(f'Error in place_order_cleanup: {e} ')
 
     ############################
     # -CONDITIONAL ORDER CLEANUP
     ############################
-    def place_conditional_order_cleanup(self, currCommand):
-        """Setting proper type name to send"""
-
+    def place_conditional_order_cleanup(self, kind: str, size: float, trigger: float, side: Optional[str] = None,
+                                        limit_price: Optional[float] = None) -> None:
+        """kind is stop, tp or trail, for trail the trigger is the trail value"""
         try:
-            type = currCommand[0] if len(currCommand) > 0 else None
-            if type == "tp":
-                type = "takeProfit"
-            if type == "trail":
-                type = "trailingStop"
-
-            size = currCommand[1] if len(currCommand) > 1 else None
-
-            """ Assign command to price"""
-            if len(currCommand) > 2:
-                if "@" in currCommand[2]:
-                    price = currCommand[2].replace('@', '')
-                else:
-                    price = currCommand[2]
-            else:
-                price = None
-
-            """ Assign command to limit price stops"""
-            if len(currCommand) > 4:
-                if "@" in currCommand[4]:
-                    limitPrice = currCommand[4].replace('@', '')
-                else:
-                    limitPrice = currCommand[4]
-            else:
-                limitPrice = None
-            """If orderSide not available then it's just a stop order put in place"""
-            try:
-
-                if self.orderSide and not limitPrice:
-                    side = "buy" if self.orderSide == "sell" else "sell"
-                elif len(currCommand) > 3:
-                    side = currCommand[3]
-                else:
+            type = {"stop": "stop", "tp": "takeProfit", "trail": "trailingStop"}[kind]
+            """Without an explicit side the order closes the open position"""
+            if side is None:
+                try:
+                    side = self.closing_side(self.market)
+                except Exception as e:
                     self.cp.red(
-                        f'Error in placing conditional order,need to assign a side order')
-            except Exception as e:
-                self.cp.red(
-                    'cleanup conditional orderSide not assign correctly')
+                        f'Error in placing conditional order,need to assign a side order: {e}')
+                    return
 
             """Sending market or limit conditional order"""
-            if size and float(size) < float(self.fatFinger):
-                if price:
-                    if limitPrice:
-                        self.place_conditional_order(
-                            market=self.market, side=side, size=size, triggerPrice=price, limit_price=limitPrice, type=type)
-                    else:
-                        self.place_conditional_order(
-                            market=self.market, side=side, size=size, triggerPrice=price, type=type)
-                else:
-                    self.cp.red(
-                        f'Error in placing conditional order cleanup,need trigger price and/or limitPrice')
-            else:
+            if not size or float(size) >= float(self.fatFinger):
                 self.cp.red(
                     f'Error in placing conditional order cleanup,need size order or exceeds fatFinger: {self.fatFinger}')
+            elif trigger is None:
+                self.cp.red(
+                    f'Error in placing conditional order cleanup,need trigger price and/or limitPrice')
+            elif type == "trailingStop":
+                # A trail value is an offset, not a price on the tick grid
+                if self.check_order(size, limit_price):
+                    self.place_conditional_order(market=self.market, side=side, size=size, type=type,
+                                                 trail_value=trigger, limit_price=limit_price)
+            elif self.check_order(size, trigger, limit_price):
+                self.place_conditional_order(market=self.market, side=side, size=size, triggerPrice=trigger,
+                                             limit_price=limit_price, type=type)
         except Exception as e:
             self.cp.red(f'Error in place_conditional_order_cleanup: {e}')
@@ -0,0 +1,143 @@
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import websocket
+
+from colorprint import ColorPrint
+
+
+class FtxWebsocketClient:
+    """
+    Threaded FTX websocket connection, logs in for private channels and
+    dispatches channel updates to registered handlers. Reconnects on drop.
+    """
+    _ENDPOINT = 'wss://ftx.com/ws/'
+    _PING_INTERVAL = 15
+
+    def __init__(self, api_key: str = None, api_secret: str = None, subaccount_name: str = None,
+                 endpoint: str = None) -> None:
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self._subaccount_name = subaccount_name
+        self._endpoint = endpoint or self._ENDPOINT
+        self._subscriptions: List[dict] = []
+        self._handlers: Dict[str, List[Callable[[dict], Any]]] = defaultdict(
+            list)
+        self._ws: Optional[websocket.WebSocketApp] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.connected = threading.Event()
+        self.logger = logging.getLogger(__name__)
+        self.cp = ColorPrint()
+
+    ############################
+    # -SUBSCRIPTIONS
+    ############################
+
+    def add_handler(self, channel: str, handler: Callable[[dict], Any]) -> None:
+        """handler receives the full message: {'channel', 'market', 'type', 'data'}"""
+        self._handlers[channel].append(handler)
+
+    def subscribe(self, channel: str, market: str = None) -> None:
+        subscription = {'channel': channel, **({'market': market} if market else {})}
+        if subscription in self._subscriptions:
+            return
+        self._subscriptions.append(subscription)
+        if self.connected.is_set():
+            self._send({'op': 'subscribe', **subscription})
+
+    def unsubscribe(self, channel: str, market: str = None) -> None:
+        subscription = {'channel': channel, **({'market': market} if market else {})}
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+            if self.connected.is_set():
+                self._send({'op': 'unsubscribe', **subscription})
+
+    ############################
+    # -CONNECTION
+    ############################
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name='ftx-websocket', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        ws = self._ws
+        if ws:
+            # Only send the close frame, the reader thread reads the reply and closes the socket.
+            # Closing it from here can close the descriptor the reader waits on, which then never wakes
+            ws.keep_running = False
+            try:
+                ws.sock.send_close()
+            except Exception:
+                ws.close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while self._running:
+            self._ws = websocket.WebSocketApp(self._endpoint,
+                                              on_open=self._on_open,
+                                              on_message=self._on_message,
+                                              on_close=self._on_close,
+                                              on_error=self._on_error)
+            self._ws.run_forever()
+            self.connected.clear()
+            if self._running:
+                time.sleep(1)
+
+    def _send(self, message: dict) -> None:
+        self._ws.send(json.dumps(message))
+
+    def _login(self) -> None:
+        ts = int(time.time() * 1000)
+        sign = hmac.new(self._api_secret.encode(),
+                        f'{ts}websocket_login'.encode(), 'sha256').hexdigest()
+        self._send({'op': 'login', 'args': {'key': self._api_key, 'sign': sign, 'time': ts,
+                                            **({'subaccount': self._subaccount_name} if self._subaccount_name else {})}})
+
+    def _ping(self, ws) -> None:
+        while self._running and self._ws is ws and self.connected.is_set():
+            time.sleep(self._PING_INTERVAL)
+            try:
+                self._send({'op': 'ping'})
+            except Exception:
+                return
+
+    def _on_open(self, ws) -> None:
+        if self._api_key and self._api_secret:
+            self._login()
+        for subscription in self._subscriptions:
+            self._send({'op': 'subscribe', **subscription})
+        self.connected.set()
+        threading.Thread(target=self._ping, args=(ws,), daemon=True).start()
+
+    def _on_message(self, ws, raw: str) -> None:
+        message = json.loads(raw)
+        if message.get('type') == 'error':
+            self.cp.red(f'Websocket error: {message}')
+            return
+        if message.get('type') not in ('update', 'partial'):
+            return
+        for handler in self._handlers.get(message.get('channel'), ()):
+            try:
+                handler(message)
+            except Exception as e:
+                self.cp.red(
+                    f'Exception in websocket handler for {message.get("channel")}: \n {e}')
+
+    def _on_close(self, ws, *args) -> None:
+        self.connected.clear()
+
+    def _on_error(self, ws, error) -> None:
+        self.logger.info(f'Websocket error: {error}')
@@ -0,0 +1,192 @@
+"""
+Local history of fills, orders and funding payments. A time range is split
+into windows that are fetched concurrently, each window pages backwards
+from its end until a page brings nothing new. Every request goes through
+the client rate limiter. Rows are kept as one .npy file per column, read
+back memory-mapped, and a state file records the time range already
+stored so later queries only fetch the part that is missing.
+"""
+import datetime
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DAY = 86400.0
+# Re-fetch a little before the stored end, fills can show up late at the boundary
+OVERLAP = 60.0
+
+
+class HistoryKind(NamedTuple):
+    fetch: str
+    time_field: str
+    market_field: str
+    # (field, numpy dtype), 'time' is the parsed time_field as unix seconds
+    columns: Tuple[Tuple[str, str], ...]
+
+
+KINDS: Dict[str, HistoryKind] = {
+    'fills': HistoryKind('get_fills', 'time', 'market', (
+        ('id', 'i8'), ('time', 'f8'), ('market', 'U32'), ('side', 'U4'), ('price', 'f8'), ('size', 'f8'),
+        ('fee', 'f8'), ('feeRate', 'f8'), ('feeCurrency', 'U10'), ('liquidity', 'U5'), ('orderId', 'i8'),
+        ('type', 'U8'))),
+    'orders': HistoryKind('get_order_history', 'createdAt', 'market', (
+        ('id', 'i8'), ('time', 'f8'), ('market', 'U32'), ('type', 'U12'), ('side', 'U4'), ('price', 'f8'),
+        ('size', 'f8'), ('filledSize', 'f8'), ('avgFillPrice', 'f8'), ('status', 'U8'), ('reduceOnly', '?'),
+        ('clientId', 'U40'))),
+    'funding': HistoryKind('get_funding_payments', 'time', 'future', (
+        ('id', 'i8'), ('time', 'f8'), ('future', 'U32'), ('payment', 'f8'), ('rate', 'f8'))),
+}
+
+# Stand-ins for null fields, per numpy dtype kind
+MISSING = {'i': -1, 'f': math.nan, 'U': '', '?': False}
+
+
+def parse_time(value: str) -> float:
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class ColumnStore:
+    """
+    One directory per (subaccount, kind, market or 'all') holding a .npy
+    file per column sorted by time, plus state.json with the stored range.
+    """
+
+    def __init__(self, root: str = './history') -> None:
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, account: str, kind: str, market: Optional[str]) -> str:
+        return os.path.join(self.root, account, kind, (market or 'all').replace('/', '_'))
+
+    def state(self, account: str, kind: str, market: Optional[str]) -> Optional[dict]:
+        """{'start': ..., 'end': ..., 'rows': ...} of what is stored, None before the first fetch"""
+        try:
+            with open(os.path.join(self._path(account, kind, market), 'state.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self, account: str, kind: str, market: Optional[str]) -> Dict[str, 'np.ndarray']:
+        """Columns memory-mapped read-only, empty arrays when nothing is stored"""
+        import numpy as np
+        path = self._path(account, kind, market)
+        if self.state(account, kind, market) is None:
+            return {name: np.empty(0, dtype) for name, dtype in KINDS[kind].columns}
+        return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                for name, dtype in KINDS[kind].columns}
+
+    def merge(self, account: str, kind: str, market: Optional[str], rows: List[dict],
+              start: float, end: float) -> int:
+        """Add rows fetched for [start, end], a row seen again replaces the stored one, returns new row count"""
+        import numpy as np
+        columns = KINDS[kind].columns
+        path = self._path(account, kind, market)
+        with self._lock:
+            stored = {name: np.array(values) for name, values in self.load(account, kind, market).items()}
+            before = len(stored['id'])
+            fetched = {name: np.array([MISSING[dtype[0]] if row.get(name) is None else row[name] for row in rows],
+                                      dtype) for name, dtype in columns}
+            merged = {name: np.concatenate([stored[name], fetched[name]]) for name, dtype in columns}
+            # Last occurrence of each id wins, so a re-fetched order keeps its latest status
+            ids = merged['id'][::-1]
+            keep = len(ids) - 1 - np.unique(ids, return_index=True)[1]
+            keep = keep[np.argsort(merged['time'][keep], kind='stable')]
+            os.makedirs(path, exist_ok=True)
+            for name, dtype in columns:
+                # Write aside and swap, a reader holding the old memmap is not disturbed
+                temporary = os.path.join(path, f'{name}.tmp.npy')
+                np.save(temporary, merged[name][keep])
+                os.replace(temporary, os.path.join(path, f'{name}.npy'))
+            state = self.state(account, kind, market)
+            if state is not None:
+                start, end = min(start, state['start']), max(end, state['end'])
+            with open(os.path.join(path, 'state.json'), 'w') as f:
+                json.dump({'start': start, 'end': end, 'rows': len(keep)}, f)
+            return len(keep) - before
+
+
+class HistoryDownloader:
+    """Fetches the parts of a time range the store does not hold yet"""
+
+    def __init__(self, ftx, store: ColumnStore = None, window: float = DAY, max_workers: int = 8) -> None:
+        self.ftx = ftx
+        self.store = store or ColumnStore()
+        self.window = window
+        self.max_workers = max_workers
+
+    @property
+    def account(self) -> str:
+        return self.ftx._subaccount_name or 'main'
+
+    def missing(self, kind: str, market: Optional[str], start: float, end: float) -> List[Tuple[float, float]]:
+        """
+        Gaps of [start, end] outside the stored range. Gaps always reach the
+        stored range, so the store stays one contiguous range without holes
+        """
+        state = self.store.state(self.account, kind, market)
+        if state is None:
+            return [(start, end)]
+        gaps = []
+        if start < state['start']:
+            gaps.append((start, state['start']))
+        if end > state['end']:
+            gaps.append((state['end'] - OVERLAP, end))
+        return gaps
+
+    def _windows(self, gaps: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        windows = []
+        for start, end in gaps:
+            count = max(1, math.ceil((end - start) / self.window))
+            step = (end - start) / count
+            windows += [(start + index * step, start + (index + 1) * step) for index in range(count)]
+        return windows
+
+    def _fetch_window(self, kind: str, market: Optional[str], window: Tuple[float, float]) -> List[dict]:
+        """All rows of one window, pages come newest first and the next page ends at the oldest row seen"""
+        spec = KINDS[kind]
+        fetch = getattr(self.ftx, spec.fetch)
+        start, end = window
+        rows: Dict[int, dict] = {}
+        seen = set()
+        while True:
+            page = fetch(market, start_time=int(start), end_time=math.ceil(end))
+            fresh = [row for row in page if row['id'] not in seen]
+            if not fresh:
+                return list(rows.values())
+            seen.update(row['id'] for row in fresh)
+            times = [parse_time(row[spec.time_field]) for row in fresh]
+            for row, at in zip(fresh, times):
+                if start <= at <= end:
+                    rows[row['id']] = dict(row, time=at)
+            if min(times) >= end:
+                # More rows in one second than one page holds, the exchange offers no finer cursor
+                return list(rows.values())
+            end = min(times)
+
+    def sync(self, kind: str, market: Optional[str], start: float, end: float = None) -> Tuple[int, int]:
+        """Fetch what is missing of [start, end], returns (windows fetched, new rows)"""
+        end = time.time() if end is None else end
+        windows = self._windows(self.missing(kind, market, start, end))
+        if not windows:
+            return 0, 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(windows))) as pool:
+            pages = list(pool.map(lambda window: self._fetch_window(kind, market, window), windows))
+        # Stored only once every window arrived, a failed sync leaves no hole in the range
+        rows = [row for page in pages for row in page]
+        added = self.store.merge(self.account, kind, market, rows,
+                                 min(start for start, _ in windows), max(end for _, end in windows))
+        return len(windows), added
+
+    def query(self, kind: str, market: Optional[str], start: float, end: float = None) -> Dict[str, 'np.ndarray']:
+        """Columns of [start, end] after fetching what is missing"""
+        import numpy as np
+        end = time.time() if end is None else end
+        self.sync(kind, market, start, end)
+        columns = self.store.load(self.account, kind, market)
+        first = np.searchsorted(columns['time'], start, side='left')
+        last = np.searchsorted(columns['time'], end, side='right')
+        return {name: values[first:last] for name, values in columns.items()}
@@ -0,0 +1,45 @@
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, Dict, List
+
+
+class InflightOrders:
+    """
+    Orders sent but not yet acknowledged, keyed by the clientId the client
+    assigned them. An order whose request failed on the network stays here
+    as 'unknown' until a lookup by clientId tells whether it landed.
+    """
+
+    def __init__(self, prefix: str = None) -> None:
+        # Random per session so ids never collide with an earlier run
+        self.prefix = prefix or uuid.uuid4().hex[:8]
+        self._counter = itertools.count(1)
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def new_client_id(self) -> str:
+        return f'{self.prefix}-{next(self._counter)}'
+
+    def add(self, client_id: str, path: str, body: dict) -> None:
+        with self._lock:
+            self._orders[client_id] = {'clientId': client_id, 'path': path, 'market': body.get('market'),
+                                       'side': body.get('side'), 'size': body.get('size'),
+                                       'sent_at': time.time(), 'failures': 0, 'status': 'sending'}
+
+    def retry(self, client_id: str, error: Exception) -> None:
+        with self._lock:
+            order = self._orders.get(client_id)
+            if order is not None:
+                order['failures'] += 1
+                order['status'] = 'unknown'
+                order['error'] = str(error)
+
+    def done(self, client_id: str) -> None:
+        with self._lock:
+            self._orders.pop(client_id, None)
+
+    def pending(self) -> List[dict]:
+        with self._lock:
+            return [dict(order) for order in self._orders.values()]
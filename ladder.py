@@ -0,0 +1,73 @@
+from typing import Optional, Tuple
+
+SPACINGS = ('linear', 'geometric', 'exponential')
+SKEWS = ('equal', 'pyramid', 'front')
+
+
+def _decimals(increment: float) -> int:
+    text = f'{increment:.10f}'.rstrip('0')
+    return len(text.split('.')[1]) if '.' in text else 0
+
+
+def snap(values: 'np.ndarray', increment: Optional[float]) -> 'np.ndarray':
+    """Round to the nearest multiple of increment, without float noise"""
+    import numpy as np
+    if not increment:
+        return values
+    return np.round(np.round(values / increment) * increment, _decimals(increment))
+
+
+def ladder_prices(start: float, end: float, total: int, spacing: str = 'linear',
+                  curve: float = 3.0) -> 'np.ndarray':
+    """
+    Rung prices from start to end, both included
+    linear - equal steps
+    geometric - equal percentage steps
+    exponential - steps grow by e^curve from start to end
+    """
+    # numpy is imported on first ladder, not at startup
+    import numpy as np
+    if total < 2:
+        return np.array([float(start)])
+    if spacing == 'linear':
+        return np.linspace(start, end, total)
+    if spacing == 'geometric':
+        return np.geomspace(start, end, total)
+    if spacing == 'exponential':
+        t = np.linspace(0.0, 1.0, total)
+        return start + (end - start) * np.expm1(curve * t) / np.expm1(curve)
+    raise ValueError(f'Unknown ladder spacing: {spacing}, use one of {SPACINGS}')
+
+
+def ladder_sizes(size: float, total: int, skew: str = 'equal', size_increment: Optional[float] = None) -> 'np.ndarray':
+    """
+    Split size over the rungs
+    equal - same size per rung
+    pyramid - size grows linearly towards the end price
+    front - size shrinks linearly towards the end price
+    """
+    import numpy as np
+    if skew == 'equal':
+        weights = np.ones(total)
+    elif skew == 'pyramid':
+        weights = np.arange(1, total + 1, dtype=float)
+    elif skew == 'front':
+        weights = np.arange(total, 0, -1, dtype=float)
+    else:
+        raise ValueError(f'Unknown ladder skew: {skew}, use one of {SKEWS}')
+    sizes = size * weights / weights.sum()
+    if size_increment:
+        sizes = snap(np.floor(sizes / size_increment + 1e-9) * size_increment, size_increment)
+        # Whatever rounding left over goes on the biggest rung so the total still matches
+        largest = int(np.argmax(sizes))
+        sizes[largest] = snap(np.array([sizes[largest] + size - sizes.sum()]), size_increment)[0]
+    return sizes
+
+
+def build_ladder(start: float, end: float, total: int, size: float, spacing: str = 'linear',
+                 skew: str = 'equal', price_increment: Optional[float] = None,
+                 size_increment: Optional[float] = None) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Prices snapped to tick and sizes per rung, computed in one vectorized pass"""
+    total = int(total)
+    prices = snap(ladder_prices(start, end, total, spacing), price_increment)
+    return prices, ladder_sizes(size, total, skew, size_increment)
@@ -0,0 +1,70 @@
+"""
+Minimal change set between a desired ladder and the live orders on its side.
+Rungs already on the book at the same price and size are kept, so they keep
+their queue priority. A live order at a wanted price is resized in place.
+Whatever is left is paired up in price order and moved with one modify each,
+instead of a cancel plus a place. Only the surplus is cancelled or placed.
+"""
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class LadderDiff(NamedTuple):
+    keep: List[dict]
+    cancel: List[dict]
+    # (live order, new price, new size)
+    modify: List[Tuple[dict, float, float]]
+    # (price, size)
+    place: List[Tuple[float, float]]
+
+    @property
+    def requests(self) -> int:
+        return len(self.cancel) + len(self.modify) + len(self.place)
+
+
+def _key(value: float) -> float:
+    # Exchange prices come back through JSON, compare without float noise
+    return round(float(value), 10)
+
+
+def remaining(order: dict) -> float:
+    return float(order.get('remainingSize') or order['size'])
+
+
+def diff_ladder(desired: List[Tuple[float, float]], live: List[dict], price_field: str = 'price') -> LadderDiff:
+    keep, modify = [], []
+
+    # Same price and size, leave it alone
+    slots: Dict[Tuple[float, float], List[int]] = defaultdict(list)
+    for index, (price, size) in enumerate(desired):
+        slots[(_key(price), _key(size))].append(index)
+    taken, unmatched = set(), []
+    for order in live:
+        free = slots.get((_key(order[price_field]), _key(remaining(order))))
+        if free:
+            taken.add(free.pop())
+            keep.append(order)
+        else:
+            unmatched.append(order)
+    rungs = [rung for index, rung in enumerate(desired) if index not in taken]
+
+    # Same price, other size: resize only
+    slots = defaultdict(list)
+    for index, (price, size) in enumerate(rungs):
+        slots[_key(price)].append(index)
+    taken, leftover = set(), []
+    for order in unmatched:
+        free = slots.get(_key(order[price_field]))
+        if free:
+            index = free.pop()
+            taken.add(index)
+            modify.append((order, rungs[index][0], rungs[index][1]))
+        else:
+            leftover.append(order)
+    rungs = sorted(rung for index, rung in enumerate(rungs) if index not in taken)
+
+    # Move the rest pairwise in price order, cancel or place only the surplus
+    leftover.sort(key=lambda order: float(order[price_field]))
+    pairs = min(len(leftover), len(rungs))
+    modify += [(order, price, size) for order, (price, size) in zip(leftover, rungs)]
+    return LadderDiff(keep, leftover[pairs:], modify, rungs[pairs:])
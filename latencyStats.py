@@ -0,0 +1,119 @@
+import json
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+_ID = re.compile(r'/\d+(?=/|$)')
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram in microseconds: every power of two is
+    split into SUB_BUCKETS linear buckets, so percentiles are within ~3%
+    and record() is O(1) with a fixed, small footprint
+    """
+    SUB_BUCKETS = 32
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - self.SUB_BUCKETS.bit_length()
+        return (shift + 1) * self.SUB_BUCKETS + (value >> shift) - self.SUB_BUCKETS
+
+    def _upper(self, index: int) -> int:
+        if index < self.SUB_BUCKETS:
+            return index
+        shift = index // self.SUB_BUCKETS - 1
+        return ((index % self.SUB_BUCKETS + self.SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, micros: int) -> None:
+        self.counts[self._index(micros)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {'count': self.count,
+                'mean_us': round(self.total / self.count) if self.count else 0,
+                'p50_us': self.percentile(50),
+                'p99_us': self.percentile(99),
+                'max_us': self.max,
+                'buckets': {str(self._upper(i)): c for i, c in sorted(self.counts.items())}}
+
+
+class LatencyStats:
+    """
+    Latency histograms per endpoint and phase (serialize, sign, network,
+    parse, total) plus error and rate-limit counters for FtxClient._request
+    """
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = defaultdict(
+            LatencyHistogram)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.rate_limited: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(method: str, path: str) -> str:
+        # orders/123456 and orders/654321 land in the same histogram
+        return f'{method} {_ID.sub("/{id}", "/" + path.split("?")[0])[1:]}'
+
+    def record(self, endpoint: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            self._histograms[(endpoint, phase)].record(int(seconds * 1e6))
+
+    def count_error(self, endpoint: str) -> None:
+        with self._lock:
+            self.errors[endpoint] += 1
+
+    def count_rate_limit(self, endpoint: str) -> None:
+        with self._lock:
+            self.rate_limited[endpoint] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self.errors.clear()
+            self.rate_limited.clear()
+
+    def rows(self) -> List[dict]:
+        with self._lock:
+            return [{'endpoint': endpoint, 'phase': phase, **histogram.to_dict()}
+                    for (endpoint, phase), histogram in sorted(self._histograms.items())]
+
+    def to_json(self) -> str:
+        rows = self.rows()
+        with self._lock:
+            return json.dumps({'latency': rows,
+                               'errors': dict(self.errors),
+                               'rate_limited': dict(self.rate_limited)}, indent=2)
+
+    def table(self) -> str:
+        lines = [f'{"endpoint":<32}{"phase":<11}{"count":>7}{"p50 ms":>10}{"p99 ms":>10}{"max ms":>10}']
+        for row in self.rows():
+            lines.append(f'{row["endpoint"]:<32}{row["phase"]:<11}{row["count"]:>7}'
+                         f'{row["p50_us"] / 1000:>10.2f}{row["p99_us"] / 1000:>10.2f}{row["max_us"] / 1000:>10.2f}')
+        for name, counter in (('errors', self.errors), ('rate limited', self.rate_limited)):
+            for endpoint, count in sorted(counter.items()):
+                lines.append(f'{endpoint:<32}{name:<11}{count:>7}')
+        return '\n'.join(lines)
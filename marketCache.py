@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+
+class MarketCache:
+    """
+    TTL cache of market metadata (priceIncrement, sizeIncrement, minProvideSize)
+    loaded from list_markets, so orders can be checked locally before sending.
+    Only the first load blocks. After that, expired data keeps being served
+    while a background thread refreshes it, and failed loads back off.
+    """
+    FIELDS = ('priceIncrement', 'sizeIncrement', 'minProvideSize')
+
+    def __init__(self, ftx, ttl: float = 300.0, retry_backoff: float = 5.0) -> None:
+        self.ftx = ftx
+        self.ttl = ttl
+        self.retry_backoff = retry_backoff
+        self._markets: Dict[str, dict] = {}
+        self._loaded_at: Optional[float] = None
+        self._retry_at = 0.0
+        self._failures = 0
+        self._error: Optional[Exception] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._first_load = threading.Lock()
+
+    def refresh(self) -> None:
+        """Blocking load of every market, raises on failure"""
+        try:
+            markets = {item['name']: {field: float(item[field]) for field in self.FIELDS if item.get(field) is not None}
+                       for item in self.ftx.list_markets()}
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                self._error = e
+                # Back off, so a failing /markets is not called again by every order
+                self._retry_at = time.monotonic() + min(self.ttl, self.retry_backoff * 2 ** (self._failures - 1))
+            raise
+        with self._lock:
+            self._markets = markets
+            self._loaded_at = time.monotonic()
+            self._failures = 0
+            self._error = None
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            # Stale data stays in use, the next get after the backoff tries again
+            pass
+        finally:
+            self._refreshing = False
+
+    def get(self, market: str) -> Optional[dict]:
+        now = time.monotonic()
+        if now >= self._retry_at and (self._loaded_at is None or now - self._loaded_at > self.ttl):
+            if self._loaded_at is not None:
+                # Expired: keep serving it and refresh off the order path
+                with self._lock:
+                    start, self._refreshing = not self._refreshing, True
+                if start:
+                    threading.Thread(target=self._refresh_in_background,
+                                     name='market-cache-refresh', daemon=True).start()
+            else:
+                with self._first_load:
+                    # Another thread may have loaded, or failed, while we waited
+                    if self._loaded_at is None and time.monotonic() >= self._retry_at:
+                        self.refresh()
+        if self._loaded_at is None and self._error is not None:
+            raise Exception(f'Market metadata unavailable, retrying after a backoff: {self._error}')
+        return self._markets.get(market)
+
+    @staticmethod
+    def _on_increment(value: float, increment: float) -> bool:
+        steps = value / increment
+        return abs(steps - round(steps)) < 1e-6
+
+    def snap_price(self, market: str, price: float) -> float:
+        info = self.get(market)
+        if not info or not info.get('priceIncrement'):
+            return price
+        increment = info['priceIncrement']
+        return round(round(price / increment) * increment, self._decimals(increment))
+
+    def snap_size(self, market: str, size: float) -> float:
+        """Size rounded down to the sizeIncrement, so scaling never sizes up"""
+        info = self.get(market)
+        if not info or not info.get('sizeIncrement'):
+            return size
+        increment = info['sizeIncrement']
+        return round(math.floor(size / increment + 1e-9) * increment, self._decimals(increment))
+
+    @staticmethod
+    def _decimals(increment: float) -> int:
+        # Round on the increment's decimals to drop float noise such as 2.3000000000000003
+        return max(0, len(f'{increment:.10f}'.rstrip('0').split('.')[1]))
+
+    def validate(self, market: str, size: float, price: float = None) -> Optional[str]:
+        """Returns an error message if the order breaks the market rules, None if it looks fine"""
+        info = self.get(market)
+        if not info:
+            return None
+        if info.get('minProvideSize') and float(size) < info['minProvideSize']:
+            return f'size {size} below minProvideSize {info["minProvideSize"]} for {market}'
+        if info.get('sizeIncrement') and not self._on_increment(float(size), info['sizeIncrement']):
+            return f'size {size} not a multiple of sizeIncrement {info["sizeIncrement"]} for {market}'
+        if price is not None and info.get('priceIncrement') and not self._on_increment(float(price), info['priceIncrement']):
+            return f'price {price} not a multiple of priceIncrement {info["priceIncrement"]} for {market}'
+        return None
@@ -0,0 +1,125 @@
+"""
+Local L2 orderbooks from the public orderbook stream. Every update is checked
+against the exchange CRC32 checksum, a mismatch drops the book and
+resubscribes for a fresh snapshot. Relative prices such as `bid-0.2%` or
+`mid+5` resolve against these books from memory.
+"""
+import bisect
+import threading
+import zlib
+from itertools import zip_longest
+from typing import Dict, List, NamedTuple
+
+from colorprint import ColorPrint
+
+
+class RelativePrice(NamedTuple):
+    ref: str
+    offset: float = 0.0
+    percent: bool = False
+
+    def resolve(self, book: 'L2Book') -> float:
+        base = {'bid': book.best_bid, 'ask': book.best_ask, 'mid': book.mid}[self.ref]()
+        return base * (1 + self.offset / 100) if self.percent else base + self.offset
+
+    def __str__(self) -> str:
+        if not self.offset:
+            return self.ref
+        return f'{self.ref}{self.offset:+g}{"%" if self.percent else ""}'
+
+
+class L2Book:
+    """Levels kept as price -> 'price:size' dicts plus ascending price lists, best bid is the last bid"""
+
+    def __init__(self, market: str) -> None:
+        self.market = market
+        self._levels = {'bids': {}, 'asks': {}}
+        self._prices: Dict[str, List[float]] = {'bids': [], 'asks': []}
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def reset(self) -> None:
+        with self._lock:
+            for side in ('bids', 'asks'):
+                self._levels[side].clear()
+                self._prices[side].clear()
+        self.ready.clear()
+
+    def apply(self, data: dict) -> bool:
+        """Apply a partial or update, True when the checksum matches"""
+        with self._lock:
+            for side in ('bids', 'asks'):
+                levels, prices = self._levels[side], self._prices[side]
+                for price, size in data.get(side, ()):
+                    if size == 0:
+                        if levels.pop(price, None) is not None:
+                            del prices[bisect.bisect_left(prices, price)]
+                    else:
+                        if price not in levels:
+                            bisect.insort(prices, price)
+                        # Kept in checksum format, so a checksum only joins strings
+                        levels[price] = f'{float(price)}:{float(size)}'
+            return self._checksum() == data.get('checksum')
+
+    def _checksum(self) -> int:
+        bids = [self._levels['bids'][price] for price in reversed(self._prices['bids'][-100:])]
+        asks = [self._levels['asks'][price] for price in self._prices['asks'][:100]]
+        text = ':'.join(':'.join(level for level in pair if level)
+                        for pair in zip_longest(bids, asks))
+        return zlib.crc32(text.encode())
+
+    def best_bid(self) -> float:
+        with self._lock:
+            return self._prices['bids'][-1]
+
+    def best_ask(self) -> float:
+        with self._lock:
+            return self._prices['asks'][0]
+
+    def mid(self) -> float:
+        with self._lock:
+            return (self._prices['bids'][-1] + self._prices['asks'][0]) / 2
+
+
+class MarketData:
+    """Orderbooks by market over a websocket client, subscribed on first use"""
+
+    def __init__(self, ws) -> None:
+        self.ws = ws
+        self._books: Dict[str, L2Book] = {}
+        self._lock = threading.Lock()
+        self.resyncs = 0
+        self.cp = ColorPrint()
+        self.ws.add_handler('orderbook', self._on_orderbook)
+
+    def subscribe(self, market: str) -> L2Book:
+        with self._lock:
+            book = self._books.get(market)
+            if book is None:
+                book = self._books[market] = L2Book(market)
+                self.ws.subscribe('orderbook', market)
+                self.ws.start()
+            return book
+
+    def book(self, market: str, timeout: float = 2.0) -> L2Book:
+        """The book of market, waits for the first snapshot after subscribing"""
+        book = self.subscribe(market)
+        if not book.ready.wait(timeout):
+            raise Exception(f'No orderbook for {market} after {timeout} s')
+        return book
+
+    def _on_orderbook(self, message: dict) -> None:
+        book = self._books.get(message.get('market'))
+        if book is None:
+            return
+        if message['type'] == 'partial':
+            book.reset()
+        if book.apply(message['data']):
+            book.ready.set()
+            return
+        # Missed or reordered update, start over from a fresh snapshot
+        self.resyncs += 1
+        self.cp.yellow(f'Orderbook checksum mismatch for {book.market}, resubscribing')
+        book.reset()
+        self.ws.unsubscribe('orderbook', book.market)
+        self.ws.subscribe('orderbook', book.market)
@@ -0,0 +1,174 @@
+import bisect
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from colorprint import ColorPrint
+
+
+class OwnOrderBook:
+    """
+    In-memory index of our open limit and conditional orders, by id, by
+    clientId and by (market, side) sorted on price. Limit orders are kept
+    current from the private orders stream. The stream carries no trigger
+    orders, so those follow our own acks and cancels. Everything is
+    reconciled against REST every `reconcile_interval` seconds.
+    """
+    # Closed ids remembered, enough to outlive any ack still in flight
+    CLOSED_IDS = 10000
+
+    def __init__(self, ftx, ws=None, reconcile_interval: float = 30.0) -> None:
+        self.ftx = ftx
+        self.ws = ws
+        self.reconcile_interval = reconcile_interval
+        self._orders: Dict[int, dict] = {}
+        self._by_client_id: Dict[str, int] = {}
+        # (market, side, conditional) -> sorted [(price, id)]
+        self._by_price: Dict[Tuple[str, str, bool], List[Tuple[float, int]]] = defaultdict(list)
+        # Ids the stream reported closed, oldest first, so a late REST ack cannot reopen them
+        self._closed: 'OrderedDict[int, None]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.ready = threading.Event()
+        self.cp = ColorPrint()
+
+    def start(self) -> None:
+        # Subscribe before the snapshot, so no update between the two is lost
+        if self.ws is not None:
+            self.ws.add_handler('orders', self._on_order)
+            self.ws.subscribe('orders')
+            self.ws.start()
+        try:
+            self.reconcile()
+        except Exception as e:
+            # Not ready until a reconcile succeeds, callers fall back to REST meanwhile
+            self.cp.red(f'Exception when loading open orders: \n {e}')
+        threading.Thread(target=self._reconcile_loop,
+                         name='orders-reconcile', daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    ############################
+    # -RECONCILE
+    ############################
+
+    def reconcile(self) -> None:
+        orders = self.ftx.list_open_orders(None, remote=True)
+        conditional = self.ftx.list_open_orders(None, conditional=True, remote=True)
+        with self._lock:
+            self._orders.clear()
+            self._by_client_id.clear()
+            self._by_price.clear()
+            for order in orders:
+                self._add(order, False)
+            for order in conditional:
+                self._add(order, True)
+        self.ready.set()
+
+    def _reconcile_loop(self) -> None:
+        while not self._stop.wait(self.reconcile_interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                self.cp.red(f'Exception when reconciling open orders: \n {e}')
+
+    ############################
+    # -UPDATES
+    ############################
+
+    def _on_order(self, message: dict) -> None:
+        self.apply(message['data'])
+
+    def apply(self, order: dict, conditional: bool = False) -> None:
+        """Upsert an order from the stream, closed or fully filled ones are dropped"""
+        closed = order.get('status') == 'closed' or order.get('remainingSize') == 0
+        with self._lock:
+            self._remove(order['id'])
+            if not closed:
+                self._add(order, conditional)
+            else:
+                self._closed[order['id']] = None
+                if len(self._closed) > self.CLOSED_IDS:
+                    self._closed.popitem(last=False)
+
+    def apply_ack(self, order: dict, conditional: bool = False) -> None:
+        """
+        Insert an order from our own REST ack. The stream is fresher, so an id
+        it already holds or closed is left alone. Market and ioc orders never rest
+        """
+        if order.get('type') == 'market' or order.get('ioc'):
+            return
+        if order.get('status') == 'closed' or order.get('remainingSize') == 0:
+            return
+        with self._lock:
+            if order['id'] in self._orders or order['id'] in self._closed:
+                return
+            self._add(order, conditional)
+
+    def remove(self, order_id) -> None:
+        with self._lock:
+            self._remove(int(order_id))
+
+    def remove_market(self, market: str, conditional: Optional[bool] = None) -> None:
+        """After a cancel-all, conditional None drops both kinds"""
+        with self._lock:
+            for order_id in [order['id'] for order in self._orders.values()
+                             if order['market'] == market and conditional in (None, order['conditional'])]:
+                self._remove(order_id)
+
+    @staticmethod
+    def _price(order: dict) -> float:
+        price = order.get('triggerPrice') if order['conditional'] else order.get('price')
+        # Market orders and trailing stops without a price sort first
+        return float(price) if price is not None else 0.0
+
+    def _add(self, order: dict, conditional: bool) -> None:
+        order = dict(order, conditional=conditional)
+        self._orders[order['id']] = order
+        if order.get('clientId'):
+            self._by_client_id[order['clientId']] = order['id']
+        bisect.insort(self._by_price[(order['market'], order['side'], conditional)],
+                      (self._price(order), order['id']))
+
+    def _remove(self, order_id: int) -> None:
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return
+        if order.get('clientId'):
+            self._by_client_id.pop(order['clientId'], None)
+        rungs = self._by_price[(order['market'], order['side'], order['conditional'])]
+        index = bisect.bisect_left(rungs, (self._price(order), order_id))
+        if index < len(rungs) and rungs[index][1] == order_id:
+            del rungs[index]
+
+    ############################
+    # -QUERIES
+    ############################
+
+    def get(self, order_id) -> Optional[dict]:
+        with self._lock:
+            order = self._orders.get(int(order_id))
+            return dict(order) if order else None
+
+    def by_client_id(self, client_id: str) -> Optional[dict]:
+        with self._lock:
+            order_id = self._by_client_id.get(client_id)
+            return dict(self._orders[order_id]) if order_id is not None else None
+
+    def orders(self, market: Optional[str] = None, conditional: Optional[bool] = None, side: Optional[str] = None,
+               low: Optional[float] = None, high: Optional[float] = None) -> List[dict]:
+        """Open orders sorted by price, the band [low, high] is found by bisection"""
+        with self._lock:
+            found = []
+            for (book_market, book_side, book_conditional), rungs in self._by_price.items():
+                if market is not None and book_market != market:
+                    continue
+                if side is not None and book_side != side:
+                    continue
+                if conditional is not None and book_conditional != conditional:
+                    continue
+                start = 0 if low is None else bisect.bisect_left(rungs, (low, -1))
+                end = len(rungs) if high is None else bisect.bisect_right(rungs, (high, float('inf')))
+                found.extend(dict(self._orders[order_id]) for price, order_id in rungs[start:end])
+            return sorted(found, key=self._price)
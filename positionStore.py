@@ -0,0 +1,133 @@
+import threading
+from typing import Dict, List, Optional, Set
+
+from colorprint import ColorPrint
+
+
+class PositionStore:
+    """
+    In-memory positions kept current from the private fills stream and
+    reconciled against REST `positions` every `reconcile_interval` seconds.
+    A market filled while the REST snapshot is in flight keeps its streamed
+    position until the next reconcile, the snapshot may or may not hold the fill.
+    """
+
+    def __init__(self, ftx, ws=None, reconcile_interval: float = 30.0) -> None:
+        self.ftx = ftx
+        self.ws = ws
+        self.reconcile_interval = reconcile_interval
+        self._positions: Dict[str, dict] = {}
+        # Markets filled since the running reconcile asked for its snapshot, None outside a reconcile
+        self._filled: Optional[Set[str]] = None
+        self._lock = threading.Lock()
+        self._reconciling = threading.Lock()
+        self._stop = threading.Event()
+        self.ready = threading.Event()
+        self.cp = ColorPrint()
+
+    def start(self) -> None:
+        # Subscribe before the snapshot, so no update between the two is lost
+        if self.ws is not None:
+            self.ws.add_handler('fills', self._on_fill)
+            self.ws.subscribe('fills')
+            self.ws.start()
+        try:
+            self.reconcile()
+        except Exception as e:
+            # Not ready until a reconcile succeeds, callers fall back to REST meanwhile
+            self.cp.red(f'Exception when loading positions: \n {e}')
+        threading.Thread(target=self._reconcile_loop,
+                         name='position-reconcile', daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    ############################
+    # -RECONCILE
+    ############################
+
+    def reconcile(self) -> None:
+        with self._reconciling:
+            with self._lock:
+                self._filled = set()
+            try:
+                positions = self.ftx.get_positions()
+            finally:
+                with self._lock:
+                    filled, self._filled = self._filled, None
+            if positions is None:
+                return
+            with self._lock:
+                snapshot = {item['future']: dict(item) for item in positions}
+                for market in filled:
+                    if market in self._positions:
+                        snapshot[market] = self._positions[market]
+                    else:
+                        snapshot.pop(market, None)
+                self._positions = snapshot
+            self.ready.set()
+
+    def _reconcile_loop(self) -> None:
+        while not self._stop.wait(self.reconcile_interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                self.cp.red(f'Exception when reconciling positions: \n {e}')
+
+    ############################
+    # -FILLS
+    ############################
+
+    def _on_fill(self, message: dict) -> None:
+        self.apply_fill(message['data'])
+
+    def apply_fill(self, fill: dict) -> None:
+        # Spot fills carry a market but no future, they open no position
+        market = fill.get('future')
+        if not market:
+            return
+        size = float(fill['size'])
+        price = float(fill['price'])
+        signed = size if fill['side'] == 'buy' else -size
+        with self._lock:
+            if self._filled is not None:
+                self._filled.add(market)
+            position = self._positions.setdefault(market, {
+                'future': market, 'size': 0.0, 'netSize': 0.0, 'side': 'buy', 'entryPrice': None,
+                'openSize': 0.0, 'estimatedLiquidationPrice': None, 'realizedPnl': 0.0, 'unrealizedPnl': 0.0})
+            old_net = float(position.get('netSize') or 0)
+            new_net = old_net + signed
+            entry = position.get('entryPrice')
+            if old_net and entry is not None and (old_net > 0) != (signed > 0):
+                # Reducing or flipping realizes the closed part against the entry
+                closed = min(size, abs(old_net))
+                realized = closed * (price - float(entry)) * (1 if old_net > 0 else -1)
+                position['realizedPnl'] = float(position.get('realizedPnl') or 0) + realized
+            if old_net == 0 or ((old_net > 0) != (new_net > 0) and new_net != 0):
+                # Opened or flipped, the fill price becomes the entry
+                entry = price
+            elif abs(new_net) > abs(old_net):
+                entry = (float(entry or price) * abs(old_net) +
+                         price * size) / abs(new_net)
+            # openSize is the position plus resting orders, keep the order part
+            resting = max(0.0, float(position.get('openSize') or 0) - abs(old_net))
+            position['netSize'] = new_net
+            position['size'] = abs(new_net)
+            position['openSize'] = abs(new_net) + resting
+            position['side'] = 'buy' if new_net >= 0 else 'sell'
+            position['entryPrice'] = entry if new_net != 0 else None
+            # The fill price is the latest price known here, REST brings the mark price on reconcile
+            position['unrealizedPnl'] = new_net * (price - entry) if new_net != 0 else 0.0
+
+    ############################
+    # -QUERIES
+    ############################
+
+    def get(self, name: str) -> Optional[dict]:
+        with self._lock:
+            position = self._positions.get(name.upper())
+            return dict(position) if position else None
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            return [dict(position) for position in self._positions.values()]
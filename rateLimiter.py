@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class RateLimitError(Exception):
+    """
+    Raised when the exchange keeps answering 429 after all retries
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, refills `rate` tokens per second up to `burst`
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens +
+                           (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available, else return the seconds to wait before retrying"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available, returns the time spent waiting"""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self) -> float:
+        # asyncio only loads for the async client, keeps the CLI start fast
+        import asyncio
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def drain(self, seconds: float) -> None:
+        """Empty the bucket and hold it for `seconds`, used after a 429"""
+        with self._lock:
+            self._tokens = -seconds * self.rate
+            self._last = time.monotonic()
+
+
+class RateLimiter:
+    """
+    One account-wide token bucket that every request takes from, and one
+    bucket per endpoint class (orders, cancels, reads) as sub-limits within it.
+    The account budget stays just under the FTX limit of 30 requests per
+    second. Reads get less of it, so a long download leaves room for orders.
+    """
+    ACCOUNT = 'account'
+    DEFAULT_LIMITS = {
+        ACCOUNT: (28, 28),
+        'orders': (28, 28),
+        'cancels': (28, 28),
+        'reads': (20, 20),
+    }
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 max_retries: int = 5, base_backoff: float = 0.2, max_backoff: float = 5.0) -> None:
+        limits = {**self.DEFAULT_LIMITS, **(limits or {})}
+        self.buckets = {name: TokenBucket(rate, burst)
+                        for name, (rate, burst) in limits.items()}
+        self.account = self.buckets[self.ACCOUNT]
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    @staticmethod
+    def endpoint_class(method: str, path: str) -> str:
+        if method == 'GET':
+            return 'reads'
+        if method == 'DELETE':
+            return 'cancels'
+        return 'orders'
+
+    def acquire(self, endpoint_class: str) -> float:
+        # Class first, so a request waiting on its sub-limit holds no account token
+        waited = self.buckets[endpoint_class].acquire()
+        return waited + self.account.acquire()
+
+    async def acquire_async(self, endpoint_class: str) -> float:
+        waited = await self.buckets[endpoint_class].acquire_async()
+        return waited + await self.account.acquire_async()
+
+    def backoff_delay(self, endpoint_class: str, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay after a 429, honours Retry-After when given, else exponential backoff, plus jitter"""
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        delay *= random.uniform(1, 1.5)
+        # A 429 is account wide, hold every request back, not only this class
+        self.buckets[endpoint_class].drain(delay)
+        self.account.drain(delay)
+        return delay
+
+    def backoff(self, endpoint_class: str, attempt: int, retry_after: Optional[str] = None) -> float:
+        delay = self.backoff_delay(endpoint_class, attempt, retry_after)
+        time.sleep(delay)
+        return delay
+
+    async def backoff_async(self, endpoint_class: str, attempt: int, retry_after: Optional[str] = None) -> float:
+        import asyncio
+        delay = self.backoff_delay(endpoint_class, attempt, retry_after)
+        await asyncio.sleep(delay)
+        return delay
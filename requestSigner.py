@@ -0,0 +1,31 @@
+import hmac
+import time
+import urllib.parse
+from typing import Dict, Optional
+
+
+class RequestSigner:
+    """
+    FTX request signing shared by FtxClient and AsyncFtxClient,
+    the HMAC is keyed with the secret once and copied per request
+    """
+
+    def __init__(self, api_key: str, api_secret: str, subaccount_name: str = None) -> None:
+        self._api_key = api_key
+        self._subaccount_name = subaccount_name
+        self._hmac = hmac.new(api_secret.encode(), digestmod='sha256')
+
+    def headers(self, method: str, path_url: str, body: Optional[bytes] = None) -> Dict[str, str]:
+        ts = int(time.time() * 1000)
+        signature_payload = f'{ts}{method}{path_url}'.encode()
+        if body:
+            signature_payload += body
+        signer = self._hmac.copy()
+        signer.update(signature_payload)
+        headers = {'FTX-KEY': self._api_key,
+                   'FTX-SIGN': signer.hexdigest(),
+                   'FTX-TS': str(ts)}
+        if self._subaccount_name:
+            headers['FTX-SUBACCOUNT'] = urllib.parse.quote(
+                self._subaccount_name)
+        return headers
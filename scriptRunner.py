@@ -0,0 +1,120 @@
+"""
+Runs a command script with pipelined execution. Commands are read in order and
+bound to the market active at that line (`instrument`) and the fatfinger at
+that line. Then, between `wait` barriers:
+    - writes for the same market run in script order in one lane, so a stop
+      placed after its entry still sees the entry
+    - lanes for different markets run in parallel
+    - a basket command acts as a barrier on both sides, it touches markets
+      that other lanes write to
+    - reads (order, position, stats, pool, inflight, history, help) run in parallel with everything
+Each segment starts once its `wait` line is read, so piped or streamed input
+runs as it arrives instead of at end of input.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from colorprint import ColorPrint
+from commandParser import (BasketCommand, FatFingerCommand, HelpCommand, HistoryCommand, InflightCommand, InstrumentCommand, ParseError,
+                           PoolCommand, PositionCommand, ShowOrdersCommand, StatsCommand, parse, split_accounts,
+                           split_commands)
+
+READS = (ShowOrdersCommand, PositionCommand, StatsCommand, PoolCommand, InflightCommand, HistoryCommand, HelpCommand)
+BARRIER = 'wait'
+
+
+class ScriptRunner:
+
+    def __init__(self, ftx, execute: Callable, max_workers: int = 8) -> None:
+        """
+        execute(client, line, command) runs one command, normally bulkCommand.process_command.
+        command is None, or the line already parsed and bound to its basket markets
+        """
+        self.ftx = ftx
+        self.execute = execute
+        self.max_workers = max_workers
+        self.cp = ColorPrint()
+
+    def _segments(self, lines: Iterable[str]) -> Iterator[Tuple[Dict[Optional[str], List], List]]:
+        """
+        Split the script on barriers into (lanes by market, reads), each one
+        yielded as soon as its barrier or the end is read, so a stream runs as it arrives
+        """
+        lanes: Dict[Optional[str], List] = {}
+        reads: List = []
+        market, fat_finger = self.ftx.market, self.ftx.fatFinger
+        # Basket definitions seen so far, baskets defined before the script resolve when they run
+        baskets: Dict[str, Tuple] = {}
+        for number, raw in enumerate(lines, 1):
+            line = raw.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line == 'quit':
+                break
+            if line == BARRIER:
+                self.ftx.market, self.ftx.fatFinger = market, fat_finger
+                yield lanes, reads
+                lanes, reads = {}, []
+                continue
+            for text in split_commands(line):
+                try:
+                    accounts, body = split_accounts(text)
+                    command = parse(body)
+                except ParseError as e:
+                    self.cp.red(f'Line {number} skipped: {e}')
+                    continue
+                if accounts:
+                    # Fan-outs run as one step, market state stays with the main account
+                    target = reads if isinstance(command, READS) else lanes.setdefault(market, [])
+                    target.append((market, fat_finger, text, None))
+                elif isinstance(command, InstrumentCommand) and command.market:
+                    market = command.market
+                    self.ftx.connections.warm(market)
+                elif isinstance(command, FatFingerCommand):
+                    fat_finger = command.value
+                elif isinstance(command, BasketCommand) and command.line is None:
+                    # Defining or showing a basket applies right away, like instrument
+                    if command.markets:
+                        baskets[command.name] = command.markets
+                    self.execute(self.ftx, text)
+                elif isinstance(command, BasketCommand):
+                    # A basket spans several markets, a basket defined before the script is only known when
+                    # it runs, so it runs alone between implicit barriers. The markets are the basket at
+                    # this line, a later redefinition does not move this command
+                    self.ftx.market, self.ftx.fatFinger = market, fat_finger
+                    if lanes or reads:
+                        yield lanes, reads
+                    yield {f'basket {command.name}': [
+                        (market, fat_finger, text, command._replace(markets=baskets.get(command.name)))]}, []
+                    lanes, reads = {}, []
+                elif isinstance(command, READS):
+                    reads.append((market, fat_finger, text, None))
+                else:
+                    lanes.setdefault(market, []).append(
+                        (market, fat_finger, text, None))
+        self.ftx.market, self.ftx.fatFinger = market, fat_finger
+        yield lanes, reads
+
+    def _run(self, steps: List) -> None:
+        # Each lane gets its own client view, so the market stays per lane
+        view = None
+        for market, fat_finger, text, command in steps:
+            if view is None or view.market != market:
+                view = self.ftx.for_market(market)
+            view.fatFinger = fat_finger
+            self.execute(view, text, command)
+
+    def run(self, lines: Iterable[str]) -> float:
+        start = time.perf_counter()
+        commands = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for lanes, reads in self._segments(lines):
+                jobs = list(lanes.values()) + [[read] for read in reads]
+                commands += sum(len(job) for job in jobs)
+                # Finish the whole segment before crossing a barrier
+                list(pool.map(self._run, jobs))
+        elapsed = time.perf_counter() - start
+        self.cp.green(
+            f'Script done: {commands} commands in {elapsed:.2f} s')
+        return elapsed
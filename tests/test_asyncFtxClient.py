@@ -0,0 +1,48 @@
+import asyncio
+import hashlib
+import hmac
+
+from aiohttp import web
+
+from asyncFtxClient import AsyncFtxClient
+
+
+async def _signed_request(params):
+    """Send one GET to a local server, returns what the server saw: (raw path, headers)"""
+    seen = {}
+
+    async def handler(request):
+        seen['path'] = request.raw_path
+        seen['headers'] = dict(request.headers)
+        return web.json_response({'success': True, 'result': []})
+
+    app = web.Application()
+    app.router.add_get('/api/orders', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with AsyncFtxClient() as ftx:
+            ftx._ENDPOINT = f'http://127.0.0.1:{port}/api/'
+            ftx._api_key, ftx._api_secret = 'key', 'secret'
+            await ftx._get('orders', params)
+    finally:
+        await runner.cleanup()
+    return seen['path'], seen['headers']
+
+
+def test_signature_covers_the_path_sent_for_spot_markets():
+    path, headers = asyncio.run(_signed_request({'market': 'BTC/USD'}))
+    # The slash stays encoded on the wire, as it was when signed
+    assert path == '/api/orders?market=BTC%2FUSD'
+    expected = hmac.new(b'secret', f'{headers["FTX-TS"]}GET{path}'.encode(), hashlib.sha256).hexdigest()
+    assert headers['FTX-SIGN'] == expected
+
+
+def test_signature_without_query():
+    path, headers = asyncio.run(_signed_request(None))
+    assert path == '/api/orders'
+    expected = hmac.new(b'secret', f'{headers["FTX-TS"]}GET{path}'.encode(), hashlib.sha256).hexdigest()
+    assert headers['FTX-SIGN'] == expected
@@ -0,0 +1,60 @@
+"""
+msgspec Structs for typed order and position responses, see codec.decode_typed
+"""
+from typing import List, Optional
+
+import msgspec
+
+
+class Order(msgspec.Struct):
+    id: int
+    market: str
+    type: str
+    side: str
+    size: float
+    price: Optional[float] = None
+    status: Optional[str] = None
+    filledSize: Optional[float] = None
+    remainingSize: Optional[float] = None
+    reduceOnly: bool = False
+    clientId: Optional[str] = None
+    triggerPrice: Optional[float] = None
+    orderPrice: Optional[float] = None
+    orderType: Optional[str] = None
+    createdAt: Optional[str] = None
+
+
+class Position(msgspec.Struct):
+    future: str
+    size: float
+    side: str
+    netSize: float = 0.0
+    entryPrice: Optional[float] = None
+    estimatedLiquidationPrice: Optional[float] = None
+    openSize: float = 0.0
+    realizedPnl: float = 0.0
+    unrealizedPnl: float = 0.0
+    cost: float = 0.0
+
+
+class _OrdersResponse(msgspec.Struct):
+    success: bool
+    result: List[Order] = []
+    error: Optional[str] = None
+
+
+class _PositionsResponse(msgspec.Struct):
+    success: bool
+    result: List[Position] = []
+    error: Optional[str] = None
+
+
+_DECODERS = {'orders': msgspec.json.Decoder(_OrdersResponse),
+             'positions': msgspec.json.Decoder(_PositionsResponse)}
+
+
+def decode(data: bytes, kind: str) -> list:
+    response = _DECODERS[kind].decode(data)
+    if not response.success:
+        raise Exception(response.error)
+    return response.result
@@ -0,0 +1,186 @@
+"""
+Local stand-in for the FTX websocket, for running the streaming stores without the exchange.
+Accepts login/subscribe/ping ops and lets the caller push channel messages:
+
+    server = StandInWebsocketServer().start()
+    ws = FtxWebsocketClient('key', 'secret', endpoint=server.url)
+    server.push('fills', {'market': 'XTZ-PERP', 'future': 'XTZ-PERP', 'side': 'buy', 'size': 1, 'price': 2.5})
+"""
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+from typing import List, Optional
+
+_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class _Connection:
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.subscriptions: List[dict] = []
+        self.logged_in = False
+        self._send_lock = threading.Lock()
+
+    def handshake(self) -> bool:
+        request = b''
+        while b'\r\n\r\n' not in request:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+        headers = dict(line.split(': ', 1) for line in request.decode().split('\r\n')[1:] if ': ' in line)
+        key = {k.lower(): v for k, v in headers.items()}['sec-websocket-key']
+        accept = base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+        self.sock.sendall(('HTTP/1.1 101 Switching Protocols\r\n'
+                           'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+                           f'Sec-WebSocket-Accept: {accept}\r\n\r\n').encode())
+        return True
+
+    def _recv_exact(self, n: int) -> bytes:
+        data = b''
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError('client closed')
+            data += chunk
+        return data
+
+    def recv_frame(self):
+        first, second = self._recv_exact(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', self._recv_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', self._recv_exact(8))[0]
+        mask = self._recv_exact(4) if second & 0x80 else None
+        payload = self._recv_exact(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    def send_frame(self, payload: bytes, opcode: int = 0x1) -> None:
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack('>H', length)
+        else:
+            header += bytes([127]) + struct.pack('>Q', length)
+        with self._send_lock:
+            self.sock.sendall(header + payload)
+
+    def close(self) -> None:
+        # shutdown wakes a thread blocked in recv on this socket and sends the FIN, close alone does neither
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def send_json(self, message: dict) -> None:
+        self.send_frame(json.dumps(message).encode())
+
+
+class StandInWebsocketServer:
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._connections: List[_Connection] = []
+        self._lock = threading.Lock()
+        self.subscribed = threading.Condition(self._lock)
+        self.received: List[dict] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.getsockname()
+        return f'ws://{host}:{port}/ws/'
+
+    def start(self) -> 'StandInWebsocketServer':
+        self._server.listen()
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        try:
+            self._server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._server.close()
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(_Connection(sock),), daemon=True).start()
+
+    def _serve(self, connection: _Connection) -> None:
+        try:
+            if not connection.handshake():
+                return
+            with self._lock:
+                self._connections.append(connection)
+            while True:
+                opcode, payload = connection.recv_frame()
+                if opcode == 0x8:
+                    connection.send_frame(payload, 0x8)
+                    return
+                if opcode == 0x9:
+                    connection.send_frame(payload, 0xA)
+                    continue
+                if opcode != 0x1:
+                    continue
+                self._handle(connection, json.loads(payload))
+        except (ConnectionError, OSError):
+            return
+        finally:
+            with self._lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            connection.close()
+
+    def _handle(self, connection: _Connection, message: dict) -> None:
+        self.received.append(message)
+        op = message.get('op')
+        if op == 'login':
+            connection.logged_in = True
+        elif op == 'ping':
+            connection.send_json({'type': 'pong'})
+        elif op in ('subscribe', 'unsubscribe'):
+            subscription = {k: v for k, v in message.items() if k in ('channel', 'market')}
+            with self._lock:
+                if op == 'subscribe':
+                    connection.subscriptions.append(subscription)
+                elif subscription in connection.subscriptions:
+                    connection.subscriptions.remove(subscription)
+                self.subscribed.notify_all()
+            connection.send_json({'type': f'{op}d', **subscription})
+
+    def wait_for_subscription(self, channel: str, market: str = None, timeout: float = 5.0) -> bool:
+        subscription = {'channel': channel, **({'market': market} if market else {})}
+        with self._lock:
+            return self.subscribed.wait_for(
+                lambda: any(subscription in c.subscriptions for c in self._connections), timeout)
+
+    def push(self, channel: str, data, market: Optional[str] = None, type: str = 'update') -> int:
+        """Send a channel message to every subscriber, returns how many received it"""
+        message = {'channel': channel, 'type': type, 'data': data,
+                   **({'market': market} if market else {})}
+        with self._lock:
+            targets = [c for c in self._connections
+                       if any(s['channel'] == channel and s.get('market') == market for s in c.subscriptions)]
+        for connection in targets:
+            connection.send_json(message)
+        return len(targets)